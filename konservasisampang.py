@@ -1,19 +1,13 @@
 # app.py
+import time
 import streamlit as st
-import geopandas as gpd
-import folium
-import pandas as pd
-from folium import GeoJsonPopup, GeoJsonTooltip
-from streamlit_folium import st_folium
-import json
-import ee
-import geemap  
 
 st.set_page_config(
     page_title="Peta Sampang",
     layout="wide",
     initial_sidebar_state="expanded"
 )
+page_started = time.perf_counter()
 
 
 st.markdown(
@@ -49,229 +43,99 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# --- Inisialisasi Google Earth Engine ---
-@st.cache_resource
-def init_ee():
-    try:
-        # Cek apakah ada secrets (di Streamlit Cloud)
-        service_account = st.secrets["EE_SERVICE_ACCOUNT"]
-        private_key = st.secrets["EE_PRIVATE_KEY"]
-
-        credentials = ee.ServiceAccountCredentials(service_account, key_data=private_key)
-        ee.Initialize(credentials)
-        print("✅ GEE: Berhasil login dengan Service Account")
-    except Exception as e:
-        st.error("Gagal login ke Google Earth Engine. Pastikan secrets sudah benar.")
-        st.stop()
-init_ee()
-
-@st.cache_data
-def load_shp_data():
-    try:
-        gdf = gpd.read_file("./Kawasan_Konservasi/Kawasan_Konservasi.shp")
-        gdf = gdf.to_crs(epsg=4326)
-
-        from shapely.geometry import box
-        roi_box = box(113.35, -7.22, 113.38, -7.19)
-        gdf_clipped = gpd.overlay(gdf, gpd.GeoDataFrame([{'geometry': roi_box}], crs=4326), how='intersection')
-
-        if gdf_clipped.empty:
-            return None
-        return gdf_clipped
-    except Exception as e:
-        st.error(f"Error membaca atau memotong SHP: {e}")
-        return None
-
-konservasi_roi = load_shp_data()
-
-if konservasi_roi is None or konservasi_roi.empty:
-    st.warning("Tidak ada data kawasan konservasi di wilayah Sampang.")
-    st.stop()
+# --- Modul berat diimpor setelah header tampil (first paint lebih cepat) ---
+import json
+import folium
+from folium import GeoJsonPopup, GeoJsonTooltip
+from sampang import config, metrics
+from sampang.ui import (MapPage, click_history_toggle, finish_metrics, metrics_toggle,
+                        show_pixel_history, threshold_slider)
 
-# --- Hitung pusat peta ---
-centroids = konservasi_roi.geometry.centroid
-center_lat = centroids.y.mean()
-center_lon = centroids.x.mean()
+run_start = metrics.mark()
+show_metrics = metrics_toggle()
 
 # --- Kolom untuk popup ---
 columns_to_show = ['NAMOBJ', 'KODKWS', 'JNSRPR', 'WKLPR', 'REMARK', 'LUASHA']
-gdf_display = konservasi_roi.copy()
-if 'LUASHA' in gdf_display.columns:
-    gdf_display['LUASHA'] = pd.to_numeric(gdf_display['LUASHA'], errors='coerce')
-for col in gdf_display.columns:
-    if col != 'geometry':
-        gdf_display[col] = gdf_display[col].astype(str).replace('<NA>', '').replace('nan', '-')
-
-# --- Konversi kawasan konservasi ke EE Geometry ---
-@st.cache_resource
-def get_conservation_geometry():
-    try:
-        geojson_data = json.loads(konservasi_roi.to_json())
-        features = [ee.Feature(ee.Geometry(f['geometry'])) for f in geojson_data['features']]
-        return ee.FeatureCollection(features).geometry()
-    except Exception as e:
-        st.error(f"Gagal konversi konservasi ke EE: {e}")
-        return None
-
-konservasi_ee = get_conservation_geometry()
-if konservasi_ee is None:
-    st.stop()
-
-# --- Hitung Statistik: Air, Darat, Darat di Konservasi ---
-@st.cache_data
-def compute_area_stats(year):
-    try:
-        roi_ee = ee.Geometry.Rectangle([113.35, -7.22, 113.38, -7.19])
-        collection = (ee.ImageCollection("COPERNICUS/S2_HARMONIZED")
-                      .filterDate(f'{year}-01-01', f'{year}-12-31')
-                      .filterBounds(roi_ee)
-                      .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 10)))
-        image = collection.median()
-        ndwi = image.normalizedDifference(['B3', 'B11'])
-        water_mask = ndwi.gt(0)
-        land_mask = ndwi.lte(0)
-        pixel_area = ee.Image.pixelArea()
-
-        # Luas total
-        water_area = water_mask.multiply(pixel_area).reduceRegion(reducer=ee.Reducer.sum(), geometry=roi_ee, scale=10, maxPixels=1e10)
-        land_area = land_mask.multiply(pixel_area).reduceRegion(reducer=ee.Reducer.sum(), geometry=roi_ee, scale=10, maxPixels=1e10)
-
-        # Luas darat di kawasan konservasi
-        land_in_cons = land_mask.multiply(pixel_area).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=konservasi_ee.intersection(roi_ee, 10),
-            scale=10,
-            maxPixels=1e10
-        )
-
-        water_ha = (water_area.get('nd').getInfo() or 0) / 10000
-        land_ha = (land_area.get('nd').getInfo() or 0) / 10000
-        land_cons_ha = (land_in_cons.get('nd').getInfo() or 0) / 10000
-
-        return {
-            "Tahun": year,
-            "Luas Air (Ha)": round(water_ha, 2),
-            "Luas Darat (Ha)": round(land_ha, 2),
-            "Darat di Konservasi (Ha)": round(land_cons_ha, 2)
-        }
-    except Exception as e:
-        st.warning(f"Gagal hitung statistik {year}: {e}")
-        return {"Tahun": year, "Luas Air (Ha)": 0, "Luas Darat (Ha)": 0, "Darat di Konservasi (Ha)": 0}
-
-# --- Hitung Statistik untuk Tahun Target ---
-target_years = [2015, 2020, 2025]
-stats_data = [compute_area_stats(year) for year in target_years]
-df_stats = pd.DataFrame(stats_data)
-
-# --- Buat Peta ---
-m = folium.Map(location=[center_lat, center_lon], zoom_start=14, tiles=None)
-
-# --- Base Layers ---
-folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
-
-folium.TileLayer(
-    tiles='https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}',
-    attr='Google Satellite',
-    name='Satellite (Google)',
-    max_zoom=19
-).add_to(m)
-
-# folium.TileLayer(
-#     tiles='https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png',
-#     attr='OpenTopoMap',
-#     name='Topographic'
-# ).add_to(m)
-
-# --- Tambahkan Kawasan Konservasi (sudah dipotong) ---
-folium.GeoJson(
-    konservasi_roi,
-    name='Kawasan Konservasi (ROI)',
-    style_function=lambda x: {
-        'fillColor': '#FFD700',
-        'color': '#FF8C00',
-        'weight': 3,
-        'fillOpacity': 0.5
-    },
-    tooltip=GeoJsonTooltip(fields=['NAMOBJ', 'LUASHA'], aliases=['Nama:', 'Luas (Ha):']),
-    popup=GeoJsonPopup(
-        fields=columns_to_show,
-        aliases=[c.replace('_', ' ') for c in columns_to_show],
-        localize=True,
-        labels=True,
-        style="background-color: #FFFACD; font-size: 13px; padding: 8px;"
-    )
-).add_to(m)
 
 # --- Warna ---
 colors_water = {2015: '#4B8BBE', 2020: '#306998', 2025: '#FFE873'}
 colors_land = {2015: '#2E8B57', 2020: '#228B22', 2025: '#8B4513'}
 colors_cons_land = {2015: '#DC143C', 2020: '#B22222', 2025: '#8B0000'}
 
-roi_ee = ee.Geometry.Rectangle([113.35, -7.22, 113.38, -7.19])
-
-# --- Tambahkan Layer Air, Darat, dan Darat di Konservasi per Tahun ---
-for year in target_years:
-    try:
-        collection = (ee.ImageCollection("COPERNICUS/S2_HARMONIZED")
-                      .filterDate(f'{year}-01-01', f'{year}-12-31')
-                      .filterBounds(roi_ee)
-                      .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 10)))
-        image = collection.median().clip(roi_ee)
-        ndwi = image.normalizedDifference(['B3', 'B11'])
-        water_mask = ndwi.gt(0)
-        land_mask = ndwi.lte(0)
-
-        # Air
-        water_vectors = water_mask.updateMask(water_mask).reduceToVectors(geometry=roi_ee, scale=10, maxPixels=1e10, crs='EPSG:4326')
-        folium.GeoJson(
-            geemap.ee_to_geojson(water_vectors),
-            name=f'Air ({year})',
-            style_function=lambda x, c=colors_water[year]: {'color': c, 'weight': 1.8, 'fillOpacity': 0.5, 'fillColor': c}
-        ).add_to(m)
-
-        # Darat
-        land_vectors = land_mask.updateMask(land_mask).reduceToVectors(geometry=roi_ee, scale=10, maxPixels=1e10, crs='EPSG:4326')
-        folium.GeoJson(
-            geemap.ee_to_geojson(land_vectors),
-            name=f'Darat ({year})',
-            style_function=lambda x, c=colors_land[year]: {'color': c, 'weight': 1.8, 'fillOpacity': 0.4, 'fillColor': c}
-        ).add_to(m)
-
-        # 🔥 Darat di Kawasan Konservasi
-        land_in_cons_mask = land_mask.updateMask(land_mask).clip(konservasi_ee)
-        land_in_cons_vectors = land_in_cons_mask.reduceToVectors(
-            geometry=roi_ee,
-            scale=10,
-            geometryType='polygon',
-            crs='EPSG:4326',
-            maxPixels=1e10
+def add_conservation_layer(parent, data):
+    folium.GeoJson(
+        data,
+        name='Kawasan Konservasi (ROI)',
+        style_function=lambda x: {
+            'fillColor': '#FFD700',
+            'color': '#FF8C00',
+            'weight': 3,
+            'fillOpacity': 0.5
+        },
+        tooltip=GeoJsonTooltip(fields=['NAMOBJ', 'LUASHA'], aliases=['Nama:', 'Luas (Ha):']),
+        popup=GeoJsonPopup(
+            fields=columns_to_show,
+            aliases=[c.replace('_', ' ') for c in columns_to_show],
+            localize=True,
+            labels=True,
+            style="background-color: #FFFACD; font-size: 13px; padding: 8px;"
         )
-        land_cons_geojson = geemap.ee_to_geojson(land_in_cons_vectors)
-
-        folium.GeoJson(
-            land_cons_geojson,
-            name=f'Darat di Konservasi ({year})',
-            style_function=lambda x, c=colors_cons_land[year]: {
-                'color': c,
-                'weight': 2.5,
-                'fillColor': c,
-                'fillOpacity': 0.6
-            },
-            tooltip=f"Darat di Konservasi - {year}"
-        ).add_to(m)
-
-    except Exception as e:
-        st.warning(f"Gagal proses layer untuk {year}: {e}")
+    ).add_to(parent)
+
+# --- Peta & statistik (lihat sampang.ui.MapPage): air, darat, dan darat di kawasan
+# konservasi per tahun, ditambah statistik per kawasan ---
+page = MapPage(
+    "konservasi",
+    layers=[
+        ("water", "Air", colors_water, 1.8, 0.5, False),
+        ("land", "Darat", colors_land, 1.8, 0.4, False),
+        # 🔥 Darat di Kawasan Konservasi
+        ("land_cons", "Darat di Konservasi", colors_cons_land, 2.5, 0.6, True),
+    ],
+    tiles=[dict(tiles='https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}', attr='Google Satellite',
+                name='Satellite (Google)', max_zoom=19)],
+    conservation_layer='Kawasan Konservasi (ROI)',
+    add_conservation=add_conservation_layer,
+    conservation_fields=['NAMOBJ', 'LUASHA'] + columns_to_show,
+    height=1000,
+    zonal=True,
+    chart=("📈 Luas Darat di Kawasan Konservasi", "Darat di Konservasi (Ha)"),
+)
 
-# --- Layer Control dan Klik Koordinat ---
-folium.LayerControl(collapsed=False).add_to(m)
-folium.LatLngPopup().add_to(m)
+# --- Ambang NDWI untuk tabel luas (lihat sampang.ui.threshold_slider). Peta dan statistik
+# per kawasan tetap memakai ambang bawaan ---
+threshold = threshold_slider()
+
+# --- Mode viewport (SAMPANG_LAYER_MODE=viewport): peta dasar tetap, fitur di viewport
+# yang dilaporkan st_folium dikirim sebagai layer dinamis (lihat sampang.viewport); geser/zoom
+# hanya menjalankan query indeks ---
+page.layer_picker()
+
+# --- Riwayat piksel: klik peta → air/darat titik itu di semua tahun dari mask store,
+# tanpa query backend (lihat sampang.ui.show_pixel_history) ---
+click_history = click_history_toggle()
+
+# --- Ekspor poligon (mode raster tidak memvektorisasi mask saat halaman dibuka) ---
+if config.LAYER_MODE == "raster":
+    with st.sidebar:
+        st.subheader("⬇️ Ekspor Poligon")
+        export_year = st.selectbox("Tahun", page.years)
+        export_layer = st.selectbox("Layer", list(page.labels()), format_func=page.labels().get)
+        if st.button("Siapkan GeoJSON"):
+            try:
+                geojson = page.engine.compute_layers(export_year, keys=(export_layer,))[export_layer]
+                st.download_button("Unduh GeoJSON", json.dumps(geojson),
+                                   file_name=f"{export_layer}_{export_year}.geojson", mime="application/geo+json")
+            except Exception as e:
+                st.warning(f"Gagal membuat poligon {export_year}: {e}")
 
 # --- Layout: 60% Peta, 40% Statistik ---
+# Peringatan, peta, dan statistik berada di slot yang diisi ulang tiap pass mode progresif
+status_slot = st.empty()
 col_map, col_stats = st.columns([6, 4])
 
 with col_map:
-    st_folium(m, width="100%", height=1000)
+    map_slot = st.empty()
 
     # --- LEGENDA dengan KOTAK WARNA ---
     st.markdown(
@@ -307,11 +171,7 @@ with col_map:
     )
 
 with col_stats:
-    st.subheader("📊 Statistik Perubahan Wilayah")
-    st.dataframe(df_stats, use_container_width=True)
-
-    st.subheader("📈 Luas Darat di Kawasan Konservasi")
-    st.bar_chart(df_stats.set_index("Tahun")[["Darat di Konservasi (Ha)"]])
+    stats_slot = st.empty()
 
     st.subheader("🔍 Insight dari Data")
     
@@ -337,3 +197,12 @@ with col_stats:
     # Tampilkan semuanya langsung tanpa expander
     for insight in insights:
         st.markdown(insight, unsafe_allow_html=True)
+
+# --- Isi slot: hasil perkiraan (skala kasar) lalu hasil skala penuh (lihat sampang.ui) ---
+map_state, map_bytes = page.run(status_slot, map_slot, stats_slot, threshold, click_history)
+
+if click_history:
+    show_pixel_history(map_state, page.engine, page.years)
+
+# --- Instrumentasi (lihat sampang.metrics) ---
+finish_metrics(show_metrics, run_start, page_started, map_bytes)
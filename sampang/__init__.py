@@ -0,0 +1,24 @@
+# Ekspor diimpor saat pertama dipakai: `import sampang` tidak langsung memuat
+# geopandas/numpy, sehingga aplikasi bisa tampil sebelum modul berat dimuat
+import importlib
+
+_EXPORTS = {
+    "load_conservation": ".data",
+    "get_engine": ".engine",
+    "DAG": ".pipeline",
+    "Pipeline": ".pipeline",
+    "LAYER_KEYS": ".stats",
+    "STATS_COLUMNS": ".stats",
+    "empty_row": ".stats",
+    "stats_row": ".stats",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'sampang' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,265 @@
+# Benchmark offline untuk setiap tahap pipeline, dengan data sintetis
+#
+#   python -m sampang.bench --sizes 0.02,0.05,0.1 --years 1,3 --output bench.json
+#   python -m sampang.bench --compare bench_lama.json --output bench.json
+#
+# Membuat tumpukan band Sentinel-2 sintetis (format npy LocalEngine) dan SHP kawasan
+# konservasi sintetis, lalu mengukur tiap tahap untuk setiap kombinasi ukuran ROI dan
+# jumlah tahun. Panggilan EE digantikan LocalEngine, yang menjalankan DAG tahap yang sama
+# (koleksi → median → NDWI → mask) di NumPy; ee_to_geojson digantikan encoder GeoJSON
+# lokal. Setiap kasus dijalankan di proses terpisah (config dibaca dari environment saat
+# import, memo pipeline mulai kosong). Hasil ditulis sebagai JSON agar bisa dibandingkan.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import config
+
+# Pusat ROI default aplikasi; ROI sintetis berupa persegi di sekitar titik ini
+CENTER = (113.365, -7.205)
+FIRST_YEAR = 2015
+SCENES_PER_YEAR = 3   # ditambah satu scene berawan yang harus tersaring
+ZONES_PER_SIDE = 3
+STAGES = ("load_shp", "overlay", "collection", "composite", "ndwi", "masks",
+          "area_reduction", "vectorize", "geojson", "topology", "folium_map", "html_render")
+
+
+def _bbox(size):
+    lon, lat = CENTER
+    return lon - size / 2, lat - size / 2, lon + size / 2, lat + size / 2
+
+
+def make_scenes(directory, size, n_years, seed=0):
+    # Garis pantai berkelok yang bergeser tiap tahun + tambak persegi + derau
+    from .engine_local import save_scene
+    rng = np.random.default_rng(seed)
+    margin = 8 * config.GRID_DEG
+    min_lon, min_lat, max_lon, max_lat = _bbox(size)
+    n = int(np.ceil((size + 2 * margin) / config.GRID_DEG))
+    transform = (min_lon - margin, config.GRID_DEG, 0, max_lat + margin, 0, -config.GRID_DEG)
+    u = np.linspace(0, 1, n)
+    xx, yy = np.meshgrid(u, u)
+    ponds = ((np.sin(xx * 60) > 0.6) & (np.sin(yy * 60) > 0.6)).astype("float32")
+    for i in range(n_years):
+        year = FIRST_YEAR + i
+        coast = 0.5 + 0.08 * np.sin(xx * 9 + i * 0.2) - 0.01 * i
+        water = (yy > coast) | (ponds * (yy > coast - 0.2) > 0)
+        for k in range(SCENES_PER_YEAR + 1):
+            noise = rng.normal(0, 80, (2, n, n))
+            b3 = np.where(water, 900, 700) + noise[0]
+            b11 = np.where(water, 150, 2200) + noise[1]
+            cloud = 40 if k == SCENES_PER_YEAR else 2 + k
+            save_scene(os.path.join(directory, str(year), f"s{k}"),
+                       {"B3": np.clip(b3, 1, None), "B11": np.clip(b11, 1, None)},
+                       f"{year}-{1 + 3 * k:02d}-15", cloud, transform)
+
+
+def make_conservation(path, size):
+    # Kisi poligon kawasan (lingkaran dengan banyak vertex) dengan atribut seperti SHP asli
+    import geopandas as gpd
+    from shapely.geometry import Point
+    min_lon, min_lat, max_lon, max_lat = _bbox(size)
+    step = size / ZONES_PER_SIDE
+    rows = []
+    for j in range(ZONES_PER_SIDE):
+        for i in range(ZONES_PER_SIDE):
+            centre = Point(min_lon + (i + 0.5) * step, min_lat + (j + 0.5) * step)
+            rows.append({"NAMOBJ": f"KK Sintetis {j * ZONES_PER_SIDE + i + 1}", "KODKWS": f"K{i + 1}",
+                         "geometry": centre.buffer(step * 0.6, quad_segs=64)})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    gpd.GeoDataFrame(rows, crs=4326).to_file(path)
+
+
+def run_case(data_dir, shp_path, years):
+    # Dijalankan di proses anak; config sudah membaca ROI/data dari environment
+    import geopandas as gpd
+    import shapely
+    from . import metrics
+    from .data import read_bbox
+    from .engine_local import LocalEngine
+    from .stats import LAYER_KEYS
+    from .mapping import add_topology_layers
+    from .tiling import roi_tiles, stitch_geometries
+    from .topology import encode_topology
+    from .vectorize import geometry_to_geojson
+
+    timings = OrderedDict((stage, 0.0) for stage in STAGES)
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        result = func()
+        timings[stage] += time.perf_counter() - start
+        return result
+
+    raw = timed("load_shp", lambda: read_bbox(shp_path, config.ROI_BOUNDS))
+    roi_gdf = gpd.GeoDataFrame([{"geometry": config.ROI}], crs=4326)
+    conservation = timed("overlay", lambda: gpd.overlay(raw, roi_gdf, how="intersection"))
+
+    engine = LocalEngine(conservation, data_dir)
+    tiles = roi_tiles()
+    run_start = metrics.mark()
+    pixels = 0
+    for year in years:
+        for tile in tiles:
+            for stage in ("collection", "composite", "ndwi", "masks"):
+                node = timed(stage, lambda: engine.pipeline.get(stage, year, tile))
+            r0, r1, c0, c1 = node["window"]
+            pixels += int((r1 - r0) * (c1 - c0))
+    stats = timed("area_reduction", lambda: engine.compute_area_stats_batch(years))
+    composite_peak = max((e["bytes"] for e in metrics.since(run_start)[0] if e["stage"] == "memory.composite"), default=0)
+
+    layers, topologies, vertices = {}, {}, 0
+    for year in years:
+        parts = timed("vectorize", lambda: [engine._tile_geometries(year, LAYER_KEYS, tile) for tile in tiles])
+        geometries = {key: stitch_geometries([p[key] for p in parts]) for key in LAYER_KEYS}
+        vertices += sum(int(shapely.get_num_coordinates(g)) for g in geometries.values())
+        # GeoJSON per layer (ekspor) dan topologi bersama (peta)
+        layers[year] = timed("geojson", lambda: {key: geometry_to_geojson(g) for key, g in geometries.items()})
+        _, dx, _, _, _, dy = engine.pipeline.get("masks", year, tiles[0])["transform"]
+        topologies[year] = timed("topology", lambda: encode_topology(geometries, grid=(dx, dy)))
+    geojson_bytes = sum(len(json.dumps(layer)) for year_layers in layers.values() for layer in year_layers.values())
+    topology_bytes = sum(len(json.dumps(t, separators=(",", ":"))) for t in topologies.values())
+
+    def build_map():
+        import folium
+        min_lon, min_lat, max_lon, max_lat = config.ROI_BOUNDS
+        m = folium.Map(location=[(min_lat + max_lat) / 2, (min_lon + max_lon) / 2], zoom_start=14, tiles=None)
+        folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
+        folium.GeoJson(conservation, name="Kawasan Konservasi").add_to(m)
+        for year, topology in topologies.items():
+            add_topology_layers(m, topology, [(key, f"{key} {year}", {}, None) for key in LAYER_KEYS])
+        folium.LayerControl().add_to(m)
+        return m
+
+    m = timed("folium_map", build_map)
+    html = timed("html_render", lambda: m.get_root().render())
+
+    return {
+        "roi_deg": round(config.ROI_BOUNDS[2] - config.ROI_BOUNDS[0], 6),
+        "years": len(years),
+        "tiles": len(tiles),
+        "pixels": pixels,
+        "zones": len(conservation),
+        "vertices": vertices,
+        "geojson_bytes": geojson_bytes,
+        "topology_bytes": topology_bytes,
+        "html_bytes": len(html.encode("utf-8")),
+        "max_rss_mb": metrics.max_rss_mb(),
+        "composite_peak_mb": round(composite_peak / 1e6, 1),
+        "stats": stats,
+        "seconds": {stage: round(value, 4) for stage, value in timings.items()},
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(sizes, year_counts, workdir, workers=1):
+    results = []
+    for size in sizes:
+        case_dir = os.path.join(workdir, f"roi_{size}")
+        shp_path = os.path.join(case_dir, "Kawasan_Konservasi", "Kawasan_Konservasi.shp")
+        make_scenes(os.path.join(case_dir, "sentinel2"), size, max(year_counts))
+        make_conservation(shp_path, size)
+        for n_years in year_counts:
+            years = [FIRST_YEAR + i for i in range(n_years)]
+            env = dict(os.environ,
+                       SAMPANG_ENGINE="local",
+                       SAMPANG_ROI=",".join(str(v) for v in _bbox(size)),
+                       SAMPANG_LOCAL_DATA=os.path.join(case_dir, "sentinel2"),
+                       SAMPANG_CACHE_DIR=os.path.join(case_dir, f"cache_{n_years}"),
+                       SAMPANG_WORKERS=str(workers),
+                       SAMPANG_PIPELINE_MEMO="100000")
+            proc = subprocess.run(
+                [sys.executable, "-m", "sampang.bench", "--case", env["SAMPANG_LOCAL_DATA"], shp_path,
+                 ",".join(str(y) for y in years)],
+                env=env, capture_output=True, text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            if proc.returncode != 0:
+                raise RuntimeError(f"Kasus ROI {size}° / {n_years} tahun gagal:\n{proc.stderr}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(_summary(result), file=sys.stderr)
+            results.append(result)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "revision": _git_revision(),
+        "workers": workers,
+        "results": results,
+    }
+
+
+def _summary(result):
+    total = sum(result["seconds"].values())
+    slowest = max(result["seconds"], key=result["seconds"].get)
+    return (f"ROI {result['roi_deg']}° × {result['years']} tahun: {total:.2f} s "
+            f"(terlama: {slowest} {result['seconds'][slowest]:.2f} s), HTML {result['html_bytes'] / 1e6:.1f} MB")
+
+
+def compare(baseline, current):
+    # Rasio waktu per tahap (baru / lama) untuk kasus yang ada di kedua hasil
+    old = {(r["roi_deg"], r["years"]): r for r in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        before = old.get((result["roi_deg"], result["years"]))
+        if before is None:
+            continue
+        lines.append(f"ROI {result['roi_deg']}° × {result['years']} tahun")
+        for stage, seconds in result["seconds"].items():
+            previous = before["seconds"].get(stage)
+            if previous:
+                lines.append(f"  {stage:<15} {previous:8.3f} s → {seconds:8.3f} s  ({seconds / previous:5.2f}×)")
+        for size in ("geojson_bytes", "topology_bytes", "html_bytes"):
+            if before.get(size) and result.get(size):
+                lines.append(f"  {size:<15} {before[size]:>10} → {result[size]:>10}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tahap pipeline dengan data sintetis")
+    parser.add_argument("--sizes", default="0.02,0.05,0.1", help="sisi ROI (derajat), dipisah koma")
+    parser.add_argument("--years", default="1,3", help="jumlah tahun, dipisah koma")
+    parser.add_argument("--workers", type=int, default=1, help="SAMPANG_WORKERS untuk tiap kasus")
+    parser.add_argument("--workdir", help="folder data sintetis (default: folder sementara)")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", help="hasil benchmark sebelumnya (JSON) untuk dibandingkan")
+    parser.add_argument("--case", nargs=3, metavar=("DATA_DIR", "SHP", "YEARS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        data_dir, shp_path, years = args.case
+        print(json.dumps(run_case(data_dir, shp_path, [int(y) for y in years.split(",")])))
+        return
+
+    sizes = [float(v) for v in args.sizes.split(",")]
+    year_counts = [int(v) for v in args.years.split(",")]
+    if args.workdir:
+        report = run_suite(sizes, year_counts, args.workdir, args.workers)
+    else:
+        with tempfile.TemporaryDirectory(prefix="sampang-bench-") as workdir:
+            report = run_suite(sizes, year_counts, workdir, args.workers)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan di {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
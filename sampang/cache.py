@@ -0,0 +1,114 @@
+# Cache hasil persisten di disk, dialamatkan berdasarkan isi parameter
+#
+# Kunci = sha256 dari semua parameter yang memengaruhi hasil (ROI, tahun, rentang
+# tanggal, ambang awan, band NDWI, ambang NDWI, skala, backend, geometri konservasi).
+# Hasil tahun yang sudah lewat tidak pernah berubah, jadi disimpan tanpa kedaluwarsa
+# (pinned); tahun berjalan kedaluwarsa setelah OPEN_PERIOD_TTL. Jika total ukuran semua
+# entri melebihi batas, entri dibuang secara LRU (mtime diperbarui setiap hit): entri
+# tahun berjalan lebih dulu, lalu entri pinned (bisa dihitung ulang bila dibutuhkan lagi).
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from . import config, metrics
+
+
+def cache_key(params):
+    payload = json.dumps(params, sort_keys=True, default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=None, max_bytes=None, ttl=None):
+        self.directory = directory or config.CACHE_DIR
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = config.OPEN_PERIOD_TTL if ttl is None else ttl
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.directory, "pinned"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "lru"), exist_ok=True)
+
+    def _path(self, key, pinned):
+        return os.path.join(self.directory, "pinned" if pinned else "lru", f"{key}.json")
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+        metrics.count("cache_total", result=name)
+
+    def get(self, params):
+        key = cache_key(params)
+        for pinned in (True, False):
+            path = self._path(key, pinned)
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+                if not pinned and time.time() - entry["created"] > self.ttl:
+                    os.remove(path)
+                    continue
+                os.utime(path)  # tandai baru dipakai (LRU)
+            except (OSError, ValueError, KeyError):
+                continue
+            self._count("hits")
+            return entry["value"]
+        self._count("misses")
+        return None
+
+    def put(self, params, value, pinned=False):
+        path = self._path(cache_key(params), pinned)
+        # Tulis atomik agar pembaca paralel tidak melihat file setengah jadi
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"created": time.time(), "params": params, "value": value}, f, default=list)
+        os.replace(tmp, path)
+        self._count("writes")
+        self._evict()
+        return value
+
+    def invalidate(self, params):
+        removed = False
+        for pinned in (True, False):
+            try:
+                os.remove(self._path(cache_key(params), pinned))
+                removed = True
+            except OSError:
+                pass
+        if removed:
+            self._count("invalidations")
+        return removed
+
+    def clear(self, pinned=False):
+        folders = ("lru", "pinned") if pinned else ("lru",)
+        for folder in folders:
+            for entry in os.scandir(os.path.join(self.directory, folder)):
+                os.remove(entry.path)
+                self._count("invalidations")
+
+    def _entries(self, folder):
+        return [e for e in os.scandir(os.path.join(self.directory, folder)) if e.name.endswith(".json")]
+
+    def _evict(self):
+        # Batas max_bytes berlaku untuk seluruh cache: entri tahun berjalan dibuang lebih dulu
+        with self._lock:
+            entries = [e for folder in ("lru", "pinned")
+                       for e in sorted(self._entries(folder), key=lambda e: e.stat().st_mtime)]
+            total = sum(e.stat().st_size for e in entries)
+            while entries and total > self.max_bytes:
+                oldest = entries.pop(0)
+                total -= oldest.stat().st_size
+                try:
+                    os.remove(oldest.path)
+                except OSError:
+                    pass
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        summary = dict(self.counters)
+        for folder in ("pinned", "lru"):
+            entries = self._entries(folder)
+            summary[f"{folder}_entries"] = len(entries)
+            summary[f"{folder}_bytes"] = sum(e.stat().st_size for e in entries)
+        return summary
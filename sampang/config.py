@@ -0,0 +1,106 @@
+# Parameter analisis yang dipakai bersama oleh kedua aplikasi
+import json
+import os
+
+import shapely
+from shapely.geometry import shape
+
+
+def parse_roi(spec):
+    # "min_lon,min_lat,max_lon,max_lat" atau path file GeoJSON (Geometry/Feature/FeatureCollection)
+    if os.path.exists(spec):
+        with open(spec) as f:
+            data = json.load(f)
+        if data.get("type") == "FeatureCollection":
+            return shapely.union_all([shape(f["geometry"]) for f in data["features"]])
+        return shape(data.get("geometry", data))
+    return shapely.box(*(float(v) for v in spec.split(",")))
+
+
+# ROI analisis (bbox atau poligon) dan batasnya (min_lon, min_lat, max_lon, max_lat)
+ROI = parse_roi(os.environ.get("SAMPANG_ROI", "113.35,-7.22,113.38,-7.19"))
+ROI_BOUNDS = tuple(ROI.bounds)
+
+TARGET_YEARS = [2015, 2020, 2025]
+
+SHP_PATH = "./Kawasan_Konservasi/Kawasan_Konservasi.shp"
+
+# --- Sentinel-2 & NDWI ---
+COLLECTION_ID = "COPERNICUS/S2_HARMONIZED"
+CLOUD_THRESHOLD = 10          # CLOUDY_PIXEL_PERCENTAGE < 10
+NDWI_BANDS = ("B3", "B11")
+NDWI_THRESHOLD = 0            # air: ndwi > 0, darat: ndwi <= 0
+# Jumlah bin histogram NDWI [-1, 1] untuk slider ambang (lihat sampang.histogram)
+HIST_BINS = int(os.environ.get("SAMPANG_HIST_BINS", "400"))
+SCALE = 10                    # meter
+# Ukuran piksel (derajat) untuk scale=10 di EPSG:4326, seperti yang dipakai EE
+METERS_PER_DEG = 111319.49079327357
+GRID_DEG = SCALE / METERS_PER_DEG
+
+# --- Backend perhitungan: "ee" (Google Earth Engine), "local" (NumPy), atau
+# "artifacts" (hanya membaca hasil prapemrosesan, tanpa kredensial EE) ---
+# Di Streamlit Cloud, secrets level root juga tersedia sebagai environment variable
+ENGINE = os.environ.get("SAMPANG_ENGINE", "ee")
+LOCAL_DATA_DIR = os.environ.get("SAMPANG_LOCAL_DATA", "./data/sentinel2")
+# Anggaran memori kerja median komposit lokal per tile (MB), berapa pun jumlah scene
+COMPOSITE_MB = float(os.environ.get("SAMPANG_COMPOSITE_MB", "256"))
+
+# Folder artefak hasil `python -m sampang.precompute` (SAMPANG_ENGINE=artifacts)
+ARTIFACTS_DIR = os.environ.get("SAMPANG_ARTIFACTS", "./artifacts")
+
+# --- Penjadwal request EE bersama per proses (lihat sampang.scheduler) ---
+EE_CONCURRENCY = int(os.environ.get("SAMPANG_EE_CONCURRENCY", "8"))   # request berjalan bersamaan
+EE_RATE = float(os.environ.get("SAMPANG_EE_RATE", "10"))              # request dimulai per detik
+EE_RETRIES = int(os.environ.get("SAMPANG_EE_RETRIES", "4"))           # percobaan ulang error sementara
+EE_BACKOFF = float(os.environ.get("SAMPANG_EE_BACKOFF", "1"))         # jeda awal backoff (detik)
+
+# Jumlah worker untuk proses per tahun secara paralel (1 = berurutan)
+WORKERS = int(os.environ.get("SAMPANG_WORKERS", "4"))
+
+# ROI yang lebih besar dari ukuran tile ini (derajat) dipecah menjadi beberapa tile
+TILE_DEG = float(os.environ.get("SAMPANG_TILE_DEG", "0.05"))
+
+# --- Cache hasil di disk (kosongkan SAMPANG_CACHE_DIR untuk menonaktifkan) ---
+CACHE_DIR = os.environ.get("SAMPANG_CACHE_DIR", "./.cache/sampang")
+CACHE_MAX_BYTES = int(os.environ.get("SAMPANG_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Periode yang belum selesai (tahun berjalan) bisa masih berubah → kedaluwarsa
+OPEN_PERIOD_TTL = int(os.environ.get("SAMPANG_OPEN_PERIOD_TTL", str(6 * 3600)))
+# SHP kawasan konservasi dikonversi sekali ke GeoParquet terindeks di folder ini
+GEOPARQUET_DIR = os.environ.get("SAMPANG_GEOPARQUET_DIR", os.path.join(CACHE_DIR, "geoparquet") if CACHE_DIR else "")
+
+# --- Deret waktu statistik (kosongkan SAMPANG_SERIES untuk hanya TARGET_YEARS) ---
+SERIES_FREQ = os.environ.get("SAMPANG_SERIES", "")  # "year" atau "month"
+SERIES_START = int(os.environ.get("SAMPANG_SERIES_START", "2015"))
+SERIES_PATH = os.environ.get("SAMPANG_SERIES_PATH", os.path.join(CACHE_DIR or ".", "series.jsonl"))
+
+# Mask air/darat semua tahun untuk riwayat piksel saat klik peta (lihat sampang.maskstore)
+MASK_STORE_DIR = os.environ.get("SAMPANG_MASK_STORE", os.path.join(CACHE_DIR or ".", "masks"))
+
+# --- Vektorisasi mask lokal (lihat sampang.vectorize) ---
+VECTORIZE_WORKERS = int(os.environ.get("SAMPANG_VECTORIZE_WORKERS", "1"))  # proses; 1 = tanpa pool
+VECTORIZE_BLOCK_ROWS = int(os.environ.get("SAMPANG_VECTORIZE_BLOCK_ROWS", "256"))              # baris per blok
+# Toleransi penyederhanaan poligon layer (piksel; butuh shapely >= 2.1); 0 = tanpa penyederhanaan
+SIMPLIFY_PX = float(os.environ.get("SAMPANG_SIMPLIFY_PX", "0"))
+
+# Tampilan layer per tahun: "vector" (poligon GeoJSON), "raster" (tile/PNG overlay), atau
+# "viewport" (hanya fitur di viewport peta, lihat sampang.viewport)
+LAYER_MODE = os.environ.get("SAMPANG_LAYER_MODE", "vector")
+# Mode viewport: toleransi penyederhanaan poligon (piksel layar pada zoom peta)
+VIEWPORT_TOLERANCE_PX = float(os.environ.get("SAMPANG_VIEWPORT_TOLERANCE_PX", "0.5"))
+
+# Mode progresif: statistik & layer dihitung dulu di skala kasar ini (meter, dari kasar ke
+# halus), ditampilkan sebagai perkiraan, lalu diganti hasil SCALE. Kosong = nonaktif
+PROGRESSIVE_SCALES = tuple(int(v) for v in os.environ.get("SAMPANG_PROGRESSIVE", "").replace(" ", "").split(",") if v)
+
+# Jumlah node pipeline (komposit, NDWI, mask) yang disimpan di memori proses.
+# 0 = semua node satu run: tile × TARGET_YEARS × tahap × skala (lihat sampang.pipeline.memo_size)
+PIPELINE_MEMO_SIZE = int(os.environ.get("SAMPANG_PIPELINE_MEMO", "0"))
+
+# --- Instrumentasi (lihat sampang.metrics) ---
+METRICS_LOG = os.environ.get("SAMPANG_METRICS_LOG", "") == "1"          # log JSON per event
+METRICS_TEXTFILE = os.environ.get("SAMPANG_METRICS_TEXTFILE", "")         # Prometheus textfile
+
+
+def roi_key():
+    # Representasi ROI yang stabil untuk kunci cache/memo
+    return shapely.to_wkt(ROI, rounding_precision=9)
@@ -0,0 +1,83 @@
+# Pemuatan data kawasan konservasi (SHP) untuk ROI
+#
+# Filter bbox ROI diteruskan ke pembacaan, sehingga hanya fitur di sekitar ROI yang
+# dibaca (penting untuk dataset konservasi skala nasional):
+#   1. GeoParquet cache (sekali konversi, baris diurutkan menurut kurva Hilbert dengan
+#      kolom bbox covering → row group yang jauh dari ROI dilewati saat membaca)
+#   2. pembacaan SHP via pyogrio/GDAL dengan filter bbox (memakai indeks spasial
+#      shapefile bila tersedia)
+import hashlib
+import os
+
+import geopandas as gpd
+from pyproj import CRS, Transformer
+from shapely.geometry import box
+
+from . import config
+
+# Ukuran row group kecil agar filter bbox bisa melewati sebagian besar file
+GEOPARQUET_ROW_GROUP = 2048
+
+
+def _source_fingerprint(path):
+    # Berubah jika salah satu file komponen shapefile berubah
+    stem = os.path.splitext(path)[0]
+    digest = hashlib.sha256(os.path.abspath(path).encode("utf-8"))
+    for ext in (".shp", ".shx", ".dbf", ".prj"):
+        try:
+            st = os.stat(stem + ext)
+        except OSError:
+            continue
+        digest.update(f"{ext}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def geoparquet_path(path, directory=None):
+    directory = config.GEOPARQUET_DIR if directory is None else directory
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(directory, f"{name}-{_source_fingerprint(path)}.parquet")
+
+
+def convert_to_geoparquet(path, directory=None):
+    # Konversi satu kali: EPSG:4326, diurutkan Hilbert, dengan kolom bbox covering
+    target = geoparquet_path(path, directory)
+    if os.path.exists(target):
+        return target
+    gdf = gpd.read_file(path).to_crs(epsg=4326)
+    if len(gdf):
+        gdf = gdf.iloc[gdf.geometry.hilbert_distance().argsort()].reset_index(drop=True)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    gdf.to_parquet(tmp, write_covering_bbox=True, row_group_size=GEOPARQUET_ROW_GROUP)
+    os.replace(tmp, target)
+    return target
+
+
+def _bounds_in_crs(bounds, crs):
+    if crs is None or CRS.from_user_input(crs).equals(CRS.from_epsg(4326)):
+        return tuple(bounds)
+    return Transformer.from_crs(4326, crs, always_xy=True).transform_bounds(*bounds)
+
+
+def read_bbox(path, bounds):
+    # Fitur yang envelope-nya bersinggungan dengan bounds (EPSG:4326), hasil dalam EPSG:4326
+    if config.GEOPARQUET_DIR:
+        try:
+            return gpd.read_parquet(convert_to_geoparquet(path), bbox=tuple(bounds))
+        except ImportError:
+            pass  # pyarrow tidak terpasang → baca SHP langsung
+    import pyogrio
+    file_crs = pyogrio.read_info(path).get("crs")
+    gdf = gpd.read_file(path, bbox=_bounds_in_crs(bounds, file_crs), engine="pyogrio")
+    return gdf.to_crs(epsg=4326)
+
+
+def load_conservation(path=None, bounds=None, clip=True):
+    # clip=True: geometri dipotong ke ROI; clip=False: fitur utuh yang bersinggungan dengan ROI
+    roi_box = box(*bounds) if bounds else config.ROI
+    gdf = read_bbox(path or config.SHP_PATH, roi_box.bounds)
+    if clip:
+        gdf = gpd.overlay(gdf, gpd.GeoDataFrame([{'geometry': roi_box}], crs=4326), how='intersection')
+    else:
+        gdf = gdf[gdf.intersects(roi_box)]
+    return gdf
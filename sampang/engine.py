@@ -0,0 +1,156 @@
+# Pemilihan backend perhitungan per deployment (SAMPANG_ENGINE)
+from itertools import combinations
+
+from . import config
+from .cache import ResultCache
+from .periods import date_window, is_closed
+from .stats import LAYER_KEYS
+
+ENGINES = ("ee", "local", "artifacts")
+
+
+def uses_conservation(kind):
+    # Statistik (kolom darat di konservasi), histogram, zonal, dan layer/topologi land_cons
+    if kind in ("stats", "zonal") or kind.startswith("histogram:"):
+        return True
+    if kind.startswith(("layer:", "topology:")):
+        return "land_cons" in kind.split(":", 1)[1].split("+")
+    return False
+
+
+class CachedEngine:
+    # Membungkus backend dengan ResultCache: statistik dan layer disimpan per tahun
+
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+        self.name = engine.name
+        self.conservation_key = engine.conservation_key
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def params(self, kind, year, keys=None):
+        params = {
+            "kind": kind,
+            "engine": self.engine.name,
+            "collection": config.COLLECTION_ID,
+            "roi": config.roi_key(),
+            "year": year,
+            "dates": date_window(year),
+            "cloud": config.CLOUD_THRESHOLD,
+            "bands": config.NDWI_BANDS,
+            "threshold": config.NDWI_THRESHOLD,
+            "scale": self.engine.scale
+        }
+        # Sidik kawasan konservasi hanya untuk hasil yang bergantung padanya, sehingga layer
+        # air/darat dipakai bersama aplikasi dengan data konservasi yang berbeda
+        if uses_conservation(kind):
+            params["conservation"] = self.conservation_key
+        # Layer yang disederhanakan disimpan terpisah; tanpa penyederhanaan kunci tidak berubah
+        if config.SIMPLIFY_PX:
+            params["simplify"] = config.SIMPLIFY_PX
+            # Layer disederhanakan sebagai satu coverage dengan layer lain yang diminta bersamanya
+            # (darat dipotong darat konservasi, lihat simplify_layers): hasilnya bergantung pada
+            # kumpulan layer dan kawasan konservasi
+            if keys is not None:
+                params["layers"] = list(keys)
+                params["conservation"] = self.conservation_key
+        return params
+
+    def _store(self, kind, year, value, keys=None):
+        return self.cache.put(self.params(kind, year, keys), value, pinned=is_closed(year))
+
+    def compute_area_stats(self, year):
+        row = self.cache.get(self.params("stats", year))
+        if row is None:
+            row = self._store("stats", year, self.engine.compute_area_stats(year))
+        return row
+
+    def compute_area_stats_batch(self, years):
+        # Hanya tahun yang belum ada di cache yang dihitung
+        rows = {year: self.cache.get(self.params("stats", year)) for year in years}
+        missing = [year for year, row in rows.items() if row is None]
+        if missing:
+            for year, row in zip(missing, self.engine.compute_area_stats_batch(missing)):
+                rows[year] = self._store("stats", year, row)
+        return [rows[year] for year in years]
+
+    def compute_layers(self, year, keys=LAYER_KEYS):
+        # Dengan penyederhanaan, layer disimpan per kumpulan layer dan dihitung ulang bersama
+        group = tuple(key for key in LAYER_KEYS if key in keys) if config.SIMPLIFY_PX else None
+        layers = {key: self.cache.get(self.params(f"layer:{key}", year, group)) for key in keys}
+        missing = tuple(key for key, layer in layers.items() if layer is None)
+        if missing:
+            for key, layer in self.engine.compute_layers(year, keys=group or missing).items():
+                if layers[key] is None:
+                    layers[key] = self._store(f"layer:{key}", year, layer, group)
+        return layers
+
+    def compute_topology(self, year, keys=LAYER_KEYS):
+        params = self.params(f"topology:{'+'.join(keys)}", year)
+        topology = self.cache.get(params)
+        if topology is None:
+            topology = self._store(f"topology:{'+'.join(keys)}", year, self.engine.compute_topology(year, keys=keys))
+        return topology
+
+    def compute_histogram(self, year):
+        # Jumlah bin bagian dari jenis hasil agar invalidate() tetap menemukan entrinya
+        kind = f"histogram:{config.HIST_BINS}"
+        result = self.cache.get(self.params(kind, year))
+        if result is None:
+            result = self._store(kind, year, self.engine.compute_histogram(year))
+        return result
+
+    def compute_rasters(self, year, colors):
+        params = {key: {**self.params(f"raster:{key}", year), "color": color} for key, color in colors.items()}
+        rasters = {key: self.cache.get(p) for key, p in params.items()}
+        missing = {key: colors[key] for key, raster in rasters.items() if raster is None}
+        if missing:
+            pinned = is_closed(year) and not self.engine.rasters_expire
+            for key, raster in self.engine.compute_rasters(year, missing).items():
+                rasters[key] = self.cache.put(params[key], raster, pinned=pinned)
+        return rasters
+
+    def compute_zonal_table(self, years):
+        params = {**self.params("zonal", years[0]), "year": None, "years": list(years), "dates": [date_window(y) for y in years]}
+        result = self.cache.get(params)
+        if result is None:
+            result = self.cache.put(params, self.engine.compute_zonal_table(list(years)),
+                                    pinned=all(is_closed(y) for y in years))
+        return result
+
+    def invalidate(self, year):
+        groups = [keys for n in range(1, len(LAYER_KEYS) + 1) for keys in combinations(LAYER_KEYS, n)]
+        topologies = tuple(f"topology:{'+'.join(keys)}" for keys in groups)
+        kinds = ("stats", f"histogram:{config.HIST_BINS}") + tuple(f"layer:{key}" for key in LAYER_KEYS) + topologies
+        for kind in kinds:
+            self.cache.invalidate(self.params(kind, year))
+        if config.SIMPLIFY_PX:
+            for keys in groups:
+                for key in keys:
+                    self.cache.invalidate(self.params(f"layer:{key}", year, keys))
+
+
+def get_engine(conservation, name=None, cache_dir=None, scale=None):
+    # scale: skala analisis (meter), default config.SCALE; skala lebih kasar untuk hasil
+    # perkiraan cepat (mode progresif)
+    name = name or config.ENGINE
+    if name == "ee":
+        from .engine_ee import EarthEngine
+        engine = EarthEngine(conservation, scale=scale)
+    elif name == "local":
+        from .engine_local import LocalEngine
+        engine = LocalEngine(conservation, scale=scale)
+    elif name == "artifacts":
+        # Artefak sudah tersimpan di disk, tidak perlu cache hasil
+        if scale and scale != config.SCALE:
+            raise ValueError(f"Artefak hanya tersedia pada skala {config.SCALE} m")
+        from .engine_artifacts import ArtifactEngine
+        return ArtifactEngine(conservation)
+    else:
+        raise ValueError(f"Backend tidak dikenal: {name} (pilihan: {', '.join(ENGINES)})")
+    cache_dir = config.CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        return engine
+    return CachedEngine(engine, ResultCache(cache_dir))
@@ -0,0 +1,123 @@
+# Backend yang hanya membaca artefak hasil `python -m sampang.precompute`
+#
+# Tidak menghitung apa pun dan tidak butuh kredensial EE; dipakai dengan
+# SAMPANG_ENGINE=artifacts dan SAMPANG_ARTIFACTS=<folder>. Struktur folder:
+#   LATEST                          versi terakhir yang selesai lengkap
+#   <versi>/manifest.json           metadata run (parameter, tahun, status tugas)
+#   <versi>/conservation.geojson    kawasan konservasi (sudah dipotong ke ROI)
+#   <versi>/stats/<tahun>.json      satu baris statistik
+#   <versi>/histograms/<tahun>.json histogram NDWI berbobot luas (lihat sampang.histogram)
+#   <versi>/layers/<tahun>/<layer>.geojson
+#   <versi>/layers/<tahun>/topology.json   semua layer satu tahun (lihat sampang.topology)
+#   <versi>/zonal.json              tabel zonal (lihat sampang.zonal)
+#   <versi>/masks/                  mask air/darat bit-packed semua tahun (lihat sampang.maskstore)
+import json
+import os
+import tempfile
+
+from . import config
+from .stats import LAYER_KEYS
+
+ARTIFACT_FORMAT = 1
+
+
+def stats_path(directory, year):
+    return os.path.join(directory, "stats", f"{year}.json")
+
+
+def histogram_path(directory, year):
+    return os.path.join(directory, "histograms", f"{year}.json")
+
+
+def layer_path(directory, year, key):
+    return os.path.join(directory, "layers", str(year), f"{key}.geojson")
+
+
+def topology_path(directory, year):
+    return os.path.join(directory, "layers", str(year), "topology.json")
+
+
+def write_json(path, value):
+    # Atomik: file yang terpotong karena run gagal tidak pernah terbaca sebagai artefak
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def resolve_version(directory=None):
+    # Folder versi: langsung (berisi manifest.json) atau versi di LATEST
+    directory = directory or config.ARTIFACTS_DIR
+    if os.path.exists(os.path.join(directory, "manifest.json")):
+        return directory
+    try:
+        with open(os.path.join(directory, "LATEST")) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Belum ada artefak lengkap di {directory}, jalankan python -m sampang.precompute")
+
+
+def read_conservation(directory=None):
+    import geopandas as gpd
+    return gpd.read_file(os.path.join(resolve_version(directory), "conservation.geojson"))
+
+
+class ArtifactEngine:
+    name = "artifacts"
+    rasters_expire = False
+
+    def __init__(self, conservation=None, directory=None):
+        self.directory = resolve_version(directory)
+        self.manifest = read_json(os.path.join(self.directory, "manifest.json"))
+        if self.manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Format artefak {self.manifest.get('format')} tidak didukung (butuh {ARTIFACT_FORMAT})")
+        self.conservation_key = self.manifest["params"]["conservation"]
+        self.scale = config.SCALE
+
+    def _read(self, path, what):
+        try:
+            return read_json(path)
+        except FileNotFoundError:
+            raise ValueError(f"Artefak {what} tidak ada di {self.directory}")
+
+    def compute_area_stats(self, year):
+        return self._read(stats_path(self.directory, year), f"statistik {year}")
+
+    def compute_area_stats_batch(self, years):
+        return [self.compute_area_stats(year) for year in years]
+
+    def compute_histogram(self, year):
+        return self._read(histogram_path(self.directory, year), f"histogram {year}")
+
+    def compute_layers(self, year, keys=LAYER_KEYS):
+        return {key: self._read(layer_path(self.directory, year, key), f"layer {key} {year}") for key in keys}
+
+    def compute_topology(self, year, keys=LAYER_KEYS):
+        path = topology_path(self.directory, year)
+        if os.path.exists(path):
+            topology = read_json(path)
+        else:
+            # Artefak lama tanpa topologi: disusun dari layer GeoJSON
+            import shapely
+            from shapely.geometry import shape
+            from .topology import encode_topology
+            layers = self.compute_layers(year, keys)
+            topology = encode_topology({key: shapely.union_all([shape(f["geometry"]) for f in layer["features"]])
+                                        for key, layer in layers.items()})
+        topology["objects"] = {key: topology["objects"][key] for key in keys}
+        return topology
+
+    def compute_zonal_table(self, years):
+        result = self._read(os.path.join(self.directory, "zonal.json"), "zonal")
+        if list(result["years"]) != list(years):
+            raise ValueError(f"Artefak zonal dibuat untuk tahun {result['years']}")
+        return result
+
+    def compute_rasters(self, year, colors):
+        raise ValueError("Artefak hanya memuat layer vektor, gunakan SAMPANG_LAYER_MODE=vector")
@@ -0,0 +1,304 @@
+# Backend Google Earth Engine (perilaku asli aplikasi)
+import json
+import math
+
+import ee
+import shapely
+from shapely.geometry import shape
+
+from . import config, metrics
+from .histogram import NDWI_RANGE
+from .parallel import stream_concurrently
+from .periods import date_window
+from .scheduler import get_scheduler, request_key
+from .pipeline import Pipeline, conservation_fingerprint
+from .stats import LAYER_KEYS, stats_row
+from .tiling import add_sums, roi_tiles, stitch_geometries
+from .topology import encode_topology
+from .vectorize import geometry_to_geojson, simplify_layers
+from .zonal import LAND, NODATA, STATES, WATER
+
+# Nilai image kelas untuk vektorisasi (darat di konservasi = darat + 1)
+WATER_CLASS, LAND_CLASS, LAND_CONS_CLASS = 1, 2, 3
+
+
+def init_ee(service_account, private_key):
+    credentials = ee.ServiceAccountCredentials(service_account, key_data=private_key)
+    ee.Initialize(credentials)
+
+
+def remote(kind, obj, func, *extra, **labels):
+    # Round trip EE lewat penjadwal proses: request identik digabung, laju dibatasi,
+    # error sementara dicoba ulang (tiap percobaan tercatat di metrics)
+    key = request_key(kind, obj, *extra)
+    return get_scheduler().run(key, lambda: metrics.remote(kind, func, **labels), kind)
+
+
+def ee_to_geojson(fc):
+    # Pengganti ringan geemap.ee_to_geojson: FeatureCollection → dict GeoJSON (satu getInfo)
+    data = fc.getInfo()
+    features = [{"type": "Feature", "geometry": f.get("geometry"), "properties": f.get("properties") or {}}
+                for f in data.get("features", [])]
+    return {"type": "FeatureCollection", "features": features}
+
+
+class EarthEngine:
+    name = "ee"
+    # URL tile dari getMapId hanya berlaku sementara, jangan disimpan permanen
+    rasters_expire = True
+
+    def __init__(self, conservation, scale=None):
+        self.conservation = conservation
+        # Skala reduksi & vektorisasi (meter); skala kasar dipakai untuk hasil perkiraan cepat
+        self.scale = scale or config.SCALE
+        self.grid_deg = self.scale / config.METERS_PER_DEG
+        self.conservation_key = conservation_fingerprint(conservation)
+        self._conservation_ee = None
+        self._zone_labels = None
+        self.pipeline = Pipeline(self)
+
+    @property
+    def conservation_ee(self):
+        # --- Konversi kawasan konservasi ke EE Geometry ---
+        if self._conservation_ee is None:
+            geojson_data = json.loads(self.conservation.to_json())
+            features = [ee.Feature(ee.Geometry(f['geometry'])) for f in geojson_data['features']]
+            self._conservation_ee = ee.FeatureCollection(features).geometry()
+        return self._conservation_ee
+
+    def roi(self, tile=None):
+        geometry = config.ROI if tile is None else tile.geometry
+        if geometry.equals(shapely.box(*geometry.bounds)):
+            return ee.Geometry.Rectangle(list(geometry.bounds))
+        return ee.Geometry(shapely.geometry.mapping(geometry), None, False)
+
+    # --- Tahap pipeline (lihat sampang.pipeline), per tile ---
+    def build_collection(self, year, tile):
+        return (ee.ImageCollection(config.COLLECTION_ID)
+                .filterDate(*date_window(year))
+                .filterBounds(self.roi(tile))
+                .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', config.CLOUD_THRESHOLD)))
+
+    def build_composite(self, year, tile, collection):
+        # Dipotong ke ROI/tile; reduceRegion atas area yang sama tetap menghasilkan luas yang sama
+        return collection.median().clip(self.roi(tile))
+
+    def build_ndwi(self, year, tile, composite):
+        return composite.normalizedDifference(list(config.NDWI_BANDS))
+
+    def build_masks(self, year, tile, ndwi):
+        return {"water": ndwi.gt(config.NDWI_THRESHOLD), "land": ndwi.lte(config.NDWI_THRESHOLD)}
+
+    def masks(self, year, tile=None):
+        masks = self.pipeline.get("masks", year, tile)
+        return masks["water"], masks["land"]
+
+    def tiles(self):
+        return roi_tiles(grid_deg=self.grid_deg)
+
+    def _each_tile(self, func):
+        for tile, result, error in stream_concurrently(func, self.tiles()):
+            if error is not None:
+                raise error
+            yield tile, result
+
+    def compute_area_stats(self, year):
+        return self.compute_area_stats_batch([year])[0]
+
+    def _tile_sums(self, years, tile):
+        # Semua tahun & kelas ditumpuk jadi satu image → satu reduceRegion, satu getInfo per tile
+        roi_ee = self.roi(tile)
+        cons_image = ee.Image.constant(1).clip(self.conservation_ee.intersection(roi_ee, 10))
+        bands = []
+        for year in years:
+            water_mask, land_mask = self.masks(year, tile)
+            suffix = str(year).replace('-', '_')  # periode bulanan "YYYY-MM"
+            bands += [water_mask.rename(f'water_{suffix}'),
+                      land_mask.rename(f'land_{suffix}'),
+                      land_mask.multiply(cons_image).rename(f'land_cons_{suffix}')]
+
+        request = ee.Image.cat(bands).multiply(ee.Image.pixelArea()).reduceRegion(
+            reducer=ee.Reducer.sum(),
+            geometry=roi_ee,
+            scale=self.scale,
+            maxPixels=1e10
+        )
+        return remote("reduceRegion", request, request.getInfo, years=len(years), tile=tile.id)
+
+    def compute_area_stats_batch(self, years):
+        # ROI besar: jumlah luas per tile digabung secara streaming
+        sums = {}
+        for _, tile_sums in self._each_tile(lambda tile: self._tile_sums(years, tile)):
+            add_sums(sums, tile_sums)
+        rows = []
+        for year in years:
+            suffix = str(year).replace('-', '_')
+            rows.append(stats_row(year, sums.get(f'water_{suffix}'), sums.get(f'land_{suffix}'), sums.get(f'land_cons_{suffix}')))
+        return rows
+
+    def _tile_vectors(self, year, keys, tile, grid):
+        # Satu reduceToVectors per tile atas image kelas (1 air, 2 darat, 3 darat di konservasi):
+        # batas air–darat hanya dikirim sekali dari EE, layer darat & darat konservasi
+        # disusun lokal dari poligon kelas
+        roi_ee = self.roi(tile)
+        water_mask, land_mask = self.masks(year, tile)
+        # Untuk ROI bertile, grid piksel dikunci (crsTransform) agar poligon tiap tile bertemu tepat di sambungan
+        params = {"crsTransform": [self.grid_deg, 0, 0, 0, -self.grid_deg, 0]} if grid else {"scale": self.scale}
+
+        classes = water_mask.multiply(WATER_CLASS)
+        if "land" in keys or "land_cons" in keys:
+            classes = classes.add(land_mask.multiply(LAND_CLASS))
+        if "land_cons" in keys:
+            cons_image = ee.Image.constant(1).clip(self.conservation_ee).unmask(0)
+            classes = classes.add(land_mask.multiply(cons_image))
+        vectors = classes.updateMask(classes.gt(0)).toInt().reduceToVectors(
+            geometry=roi_ee,
+            geometryType='polygon',
+            labelProperty='label',
+            crs='EPSG:4326',
+            maxPixels=1e10,
+            **params
+        )
+        geojson = remote("ee_to_geojson", vectors, lambda: ee_to_geojson(vectors), year=year, tile=tile.id)
+
+        parts = {}
+        for f in geojson["features"]:
+            parts.setdefault(f["properties"].get("label"), []).append(shape(f["geometry"]))
+        by_class = {label: shapely.union_all(geometries) for label, geometries in parts.items()}
+        empty = shapely.Polygon()
+        geometries = {"water": by_class.get(WATER_CLASS, empty), "land_cons": by_class.get(LAND_CONS_CLASS, empty)}
+        geometries["land"] = shapely.union_all([by_class.get(LAND_CLASS, empty), geometries["land_cons"]])
+        return {key: geometries[key] for key in keys}
+
+    def layer_geometries(self, year, keys=LAYER_KEYS):
+        tiles = self.tiles()
+        grid = len(tiles) > 1
+        parts = {key: [] for key in keys}
+        for _, geometries in self._each_tile(lambda tile: self._tile_vectors(year, keys, tile, grid)):
+            for key in keys:
+                parts[key].append(geometries[key])
+        geometries = {key: stitch_geometries(parts[key]) for key in keys}
+        return simplify_layers(geometries, config.SIMPLIFY_PX * self.grid_deg)
+
+    def compute_layers(self, year, keys=LAYER_KEYS):
+        geometries = self.layer_geometries(year, keys)
+        with metrics.timer("geojson", year=year):
+            return {key: geometry_to_geojson(geometry) for key, geometry in geometries.items()}
+
+    def compute_topology(self, year, keys=LAYER_KEYS):
+        # Poligon reduceToVectors berada di grid piksel grid_deg (lihat _tile_vectors)
+        geometries = self.layer_geometries(year, keys)
+        with metrics.timer("topology", year=year):
+            return encode_topology(geometries, grid=self.topology_grid(year))
+
+    def topology_grid(self, year):
+        return self.grid_deg, self.grid_deg
+
+    def mask_grid(self, year):
+        # Grid grid_deg yang memuat ROI: (transform, jendela); sama untuk semua tahun
+        g = self.grid_deg
+        min_lon, min_lat, max_lon, max_lat = config.ROI_BOUNDS
+        x0 = math.floor(min_lon / g) * g
+        y0 = math.ceil(max_lat / g) * g
+        return (x0, g, 0.0, y0, 0.0, -g), (0, math.ceil((y0 - min_lat) / g), 0, math.ceil((max_lon - x0) / g))
+
+    def _tile_pixels(self, year, tile, transform):
+        # Mask satu tile diunduh sebagai array (computePixels) di grid mask_grid
+        x0, g, _, y0, _, _ = transform
+        min_lon, min_lat, max_lon, max_lat = tile.bounds
+        window = (math.floor((y0 - max_lat) / g + 1e-6), math.ceil((y0 - min_lat) / g - 1e-6),
+                  math.floor((min_lon - x0) / g + 1e-6), math.ceil((max_lon - x0) / g - 1e-6))
+        r0, r1, c0, c1 = window
+        water_mask, land_mask = self.masks(year, tile)
+        image = ee.Image.cat([water_mask.unmask(0).rename('water'), land_mask.unmask(0).rename('land')]).toByte()
+        request = {
+            "expression": image,
+            "fileFormat": "NUMPY_NDARRAY",
+            "grid": {
+                "dimensions": {"width": c1 - c0, "height": r1 - r0},
+                "affineTransform": {"scaleX": g, "shearX": 0, "translateX": x0 + c0 * g,
+                                    "shearY": 0, "scaleY": -g, "translateY": y0 - r0 * g},
+                "crsCode": "EPSG:4326",
+            },
+        }
+        pixels = remote("computePixels", image, lambda: ee.data.computePixels(request), window, year=year, tile=tile.id)
+        return window, pixels['water'].astype(bool), pixels['land'].astype(bool)
+
+    def mask_tiles(self, year):
+        # (jendela di grid mask_grid, air, darat) per tile
+        transform, _ = self.mask_grid(year)
+        for _, pixels in self._each_tile(lambda tile: self._tile_pixels(year, tile, transform)):
+            yield pixels
+
+    def zone_labels(self):
+        # Raster label kawasan (fitur ke-i → i+1) di server EE; tumpang tindih → label terbesar
+        if self._zone_labels is None:
+            geojson_data = json.loads(self.conservation.to_json())
+            features = [ee.Feature(ee.Geometry(f['geometry']), {'label': i + 1})
+                        for i, f in enumerate(geojson_data['features'])]
+            self._zone_labels = ee.FeatureCollection(features).reduceToImage(['label'], ee.Reducer.max()).unmask(0)
+        return self._zone_labels
+
+    def _tile_zonal(self, years, tile):
+        # Kode keadaan semua tahun + label kawasan → satu reduceRegion ber-group (setara bincount)
+        code = ee.Image(0)
+        for i, year in enumerate(years):
+            water_mask, land_mask = self.masks(year, tile)
+            state = ee.Image(NODATA).where(water_mask.eq(1), WATER).where(land_mask.eq(1), LAND)
+            code = code.add(state.multiply(STATES ** i))
+        group = self.zone_labels().multiply(STATES ** len(years)).add(code).toInt64().rename('group')
+
+        request = ee.Image.pixelArea().addBands(group).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName='group'),
+            geometry=self.roi(tile),
+            scale=self.scale,
+            maxPixels=1e10
+        )
+        result = remote("reduceRegion_zonal", request, request.getInfo, years=len(years), tile=tile.id)
+        return {int(g['group']): g['sum'] for g in result.get('groups', [])}
+
+    def _tile_histogram(self, year, tile):
+        # Kode bin NDWI + bins × (di kawasan) → satu reduceRegion ber-group, seperti _tile_zonal
+        bins = config.HIST_BINS
+        ndwi = self.pipeline.get("ndwi", year, tile)
+        index = (ndwi.subtract(NDWI_RANGE[0]).multiply(bins / (NDWI_RANGE[1] - NDWI_RANGE[0]))
+                 .ceil().subtract(1).clamp(0, bins - 1))
+        cons_image = ee.Image.constant(1).clip(self.conservation_ee).unmask(0)
+        group = index.add(cons_image.multiply(bins)).toInt().rename('group')
+
+        request = ee.Image.pixelArea().updateMask(ndwi.mask()).addBands(group).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName='group'),
+            geometry=self.roi(tile),
+            scale=self.scale,
+            maxPixels=1e10
+        )
+        result = remote("reduceRegion_histogram", request, request.getInfo, year=year, tile=tile.id)
+        return {int(g['group']): g['sum'] for g in result.get('groups', [])}
+
+    def compute_histogram(self, year):
+        table = {}
+        for _, part in self._each_tile(lambda tile: self._tile_histogram(year, tile)):
+            add_sums(table, part)
+        return {"bins": config.HIST_BINS, "table": table}
+
+    def compute_zonal_table(self, years):
+        table = {}
+        for _, part in self._each_tile(lambda tile: self._tile_zonal(years, tile)):
+            add_sums(table, part)
+        return {"years": list(years), "labels": len(self.conservation), "table": table}
+
+    def compute_rasters(self, year, colors):
+        # Mask dirender sebagai tile oleh EE (satu getMapId per layer, tanpa vektorisasi);
+        # tile peta dihitung EE sesuai kebutuhan, jadi ROI tidak perlu dipecah
+        water_mask, land_mask = self.masks(year)
+        images = {
+            "water": water_mask.selfMask(),
+            "land": land_mask.selfMask(),
+            "land_cons": land_mask.selfMask().clip(self.conservation_ee)
+        }
+        rasters = {}
+        for key, color in colors.items():
+            map_id = remote("getMapId", images[key], lambda: images[key].getMapId({"palette": [color.lstrip('#')]}),
+                            color, year=year, layer=key)
+            rasters[key] = {"type": "tiles", "url": map_id["tile_fetcher"].url_format}
+        return rasters
@@ -0,0 +1,433 @@
+# Backend lokal: pipeline NDWI dengan NumPy di atas tumpukan band Sentinel-2 lokal
+#
+# Struktur data (SAMPANG_LOCAL_DATA, default ./data/sentinel2), dicari rekursif:
+#   <scene>/meta.json + B3.npy + B11.npy   (array 2D, dibaca lewat memmap)
+#   <scene>.tif                            (GeoTIFF, butuh rasterio; nama band
+#                                           di deskripsi band, metadata di tag)
+# meta.json / tag GeoTIFF:
+#   {"date": "2020-03-14", "CLOUDY_PIXEL_PERCENTAGE": 3.2,
+#    "transform": [x0, dx, 0, y0, 0, dy], "crs": "EPSG:4326"}
+# Semua scene dalam satu periode harus berada di grid EPSG:4326 yang sama.
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+from . import config, metrics
+from .geodesy import row_areas
+from .histogram import histogram_table
+from .parallel import stream_concurrently
+from .periods import date_window
+from .pipeline import Pipeline, conservation_fingerprint, memo_size
+from .raster import MAX_OVERLAY_PX, mask_to_overlay
+from .stats import LAYER_KEYS, stats_row
+from .tiling import add_sums, roi_tiles, stitch_geometries
+from .topology import encode_topology
+from .vectorize import geometry_to_geojson, simplify_layers, vectorize_mask, window_bounds
+from .zonal import cached_labels, label_table, state_codes
+
+
+class Scene:
+    def __init__(self, path, date, cloud, transform, shape, crs="EPSG:4326"):
+        self.path = path
+        self.date = date
+        self.cloud = float(cloud)
+        self.transform = tuple(float(v) for v in transform)
+        self.shape = tuple(shape)
+        self.crs = crs
+
+    @property
+    def bounds(self):
+        x0, dx, _, y0, _, dy = self.transform
+        x1 = x0 + dx * self.shape[1]
+        y1 = y0 + dy * self.shape[0]
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+    def read(self, band, rows, cols, step=1):
+        # step > 1: baris/kolom grid kasar; tiap piksel kasar diambil dari piksel asli di
+        # tengah blok step×step-nya
+        if step > 1:
+            rows = slice(rows.start * step + step // 2, rows.stop * step, step)
+            cols = slice(cols.start * step + step // 2, cols.stop * step, step)
+        if self.path.endswith(".tif"):
+            import rasterio
+            from rasterio.windows import Window
+            with rasterio.open(self.path) as src:
+                index = list(src.descriptions).index(band) + 1
+                window = Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+                return src.read(index, window=window)[::step, ::step].astype("float32")
+        data = np.load(os.path.join(self.path, f"{band}.npy"), mmap_mode="r")
+        return np.asarray(data[rows, cols], dtype="float32")
+
+
+def _load_npy_scene(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    band = np.load(os.path.join(path, f"{config.NDWI_BANDS[0]}.npy"), mmap_mode="r")
+    return Scene(path, meta["date"], meta["CLOUDY_PIXEL_PERCENTAGE"], meta["transform"],
+                 band.shape, meta.get("crs", "EPSG:4326"))
+
+
+def _load_tif_scene(path):
+    try:
+        import rasterio
+    except ImportError:
+        raise ImportError("Membaca GeoTIFF butuh paket 'rasterio'")
+    with rasterio.open(path) as src:
+        tags = src.tags()
+        t = src.transform
+        return Scene(path, tags["date"], tags["CLOUDY_PIXEL_PERCENTAGE"],
+                     (t.c, t.a, t.b, t.f, t.d, t.e), (src.height, src.width), str(src.crs))
+
+
+def save_scene(path, bands, date, cloud, transform, crs="EPSG:4326"):
+    # Simpan satu scene dalam format npy yang bisa dibaca LocalEngine
+    os.makedirs(path, exist_ok=True)
+    for name, array in bands.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(array, dtype="float32"))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"date": date, "CLOUDY_PIXEL_PERCENTAGE": cloud,
+                   "transform": list(transform), "crs": crs}, f)
+
+
+def normalized_difference(first, second):
+    # Sama seperti ee.Image.normalizedDifference: nilai negatif → masked, 0/0 → 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = first + second
+        nd = np.where(total == 0, 0.0, (first - second) / total)
+    nd[(first < 0) | (second < 0) | np.isnan(first) | np.isnan(second)] = np.nan
+    return nd
+
+
+# Byte per nilai saat median satu blok: buffer float32 + mask bool sementara
+MEDIAN_BYTES = 5
+
+
+def composite_rows(n_scenes, n_cols, budget_bytes):
+    # Jumlah baris per blok agar buffer median tidak melebihi anggaran (minimal satu baris)
+    return max(1, budget_bytes // max(1, n_scenes * n_cols * MEDIAN_BYTES))
+
+
+def median_stack(stack):
+    # Median per piksel atas sumbu scene, sama dengan np.nanmedian (nodata 0/NaN diabaikan,
+    # genap → rata-rata dua nilai tengah), tetapi diurutkan in-place tanpa salinan tumpukan
+    stack[stack == 0] = np.inf  # nodata Sentinel-2
+    stack[np.isnan(stack)] = np.inf
+    stack.sort(axis=0)
+    count = len(stack) - (stack == np.inf).sum(axis=0)
+    lo = np.take_along_axis(stack, np.maximum(count - 1, 0)[None] // 2, axis=0)[0]
+    hi = np.take_along_axis(stack, (count // 2)[None], axis=0)[0]
+    median = (lo + hi) / 2
+    median[count == 0] = np.nan
+    return median
+
+
+def _centers_in(centers, lo, hi, include_hi):
+    # Pusat piksel di sambungan dua tile hanya dihitung sekali (milik tile sebelah kiri/bawah)
+    return (centers >= lo) & ((centers <= hi) if include_hi else (centers < hi))
+
+
+class LocalEngine:
+    name = "local"
+    rasters_expire = False
+
+    def __init__(self, conservation, data_dir=None, composite_mb=None, scale=None):
+        self.data_dir = data_dir or config.LOCAL_DATA_DIR
+        # Skala analisis (meter); di atas ukuran piksel citra, grid diambil sampelnya (lihat _step)
+        self.scale = scale or config.SCALE
+        self.composite_bytes = int((composite_mb or config.COMPOSITE_MB) * 1024 * 1024)
+        self.conservation_key = conservation_fingerprint(conservation)
+        self.zone_geometries = [] if conservation is None else list(conservation.geometry.values)
+        for geometry in self.zone_geometries:
+            if geometry is not None:
+                shapely.prepare(geometry)
+        if conservation is not None and len(conservation):
+            cons = shapely.union_all(np.asarray(conservation.geometry.values)).intersection(config.ROI)
+        else:
+            cons = shapely.Polygon()
+        shapely.prepare(cons)
+        self.conservation = cons
+        self._cons_masks = OrderedDict()
+        self._scenes = None
+        self.pipeline = Pipeline(self, namespace=f"local:{os.path.abspath(self.data_dir)}")
+
+    # --- Koleksi citra (setara filterDate + filterBounds + filter CLOUDY_PIXEL_PERCENTAGE) ---
+    def _all_scenes(self):
+        if self._scenes is None:
+            scenes = []
+            for root, dirs, files in os.walk(self.data_dir):
+                if "meta.json" in files:
+                    scenes.append(_load_npy_scene(root))
+                    dirs[:] = []
+                    continue
+                scenes.extend(_load_tif_scene(os.path.join(root, f)) for f in files if f.endswith(".tif"))
+            self._scenes = sorted(scenes, key=lambda s: (s.date, s.path))
+        return self._scenes
+
+    def refresh(self):
+        # Baca ulang daftar scene (mis. setelah citra baru ditambahkan)
+        self._scenes = None
+
+    def scenes(self, year, bounds=None):
+        start, end = date_window(year)
+        area = shapely.box(*(bounds or config.ROI_BOUNDS))
+        return [s for s in self._all_scenes()
+                if start <= s.date < end
+                and s.cloud < config.CLOUD_THRESHOLD
+                and shapely.box(*s.bounds).intersects(area)]
+
+    def _grid(self, scenes):
+        if not scenes:
+            raise ValueError("Tidak ada citra lokal yang memenuhi filter")
+        first = scenes[0]
+        for s in scenes[1:]:
+            if s.transform != first.transform or s.shape != first.shape:
+                raise ValueError(f"Grid scene {s.path} berbeda dengan {first.path}")
+        if first.crs.upper() not in ("EPSG:4326", "OGC:CRS84"):
+            raise ValueError(f"CRS {first.crs} belum didukung, gunakan EPSG:4326")
+        return first.transform, first.shape
+
+    def _step(self, transform):
+        # Faktor pengambilan sampel grid citra untuk skala analisis (1 = resolusi asli)
+        pixel_m = abs(transform[1]) * config.METERS_PER_DEG
+        return max(1, int(round(self.scale / pixel_m)))
+
+    def _roi_window(self, transform, shape, bounds=None):
+        # Piksel yang pusatnya berada di dalam ROI/tile (seperti reduceRegion di EE)
+        x0, dx, _, y0, _, dy = transform
+        xs = x0 + (np.arange(shape[1]) + 0.5) * dx
+        ys = y0 + (np.arange(shape[0]) + 0.5) * dy
+        min_lon, min_lat, max_lon, max_lat = bounds or config.ROI_BOUNDS
+        roi_max_lon, roi_max_lat = config.ROI_BOUNDS[2], config.ROI_BOUNDS[3]
+        cols = np.flatnonzero(_centers_in(xs, min_lon, max_lon, max_lon >= roi_max_lon))
+        rows = np.flatnonzero(_centers_in(ys, min_lat, max_lat, max_lat >= roi_max_lat))
+        if not len(cols) or not len(rows):
+            if bounds is None or tuple(bounds) == config.ROI_BOUNDS:
+                raise ValueError("ROI berada di luar grid citra lokal")
+            return 0, 0, 0, 0  # tile tanpa pusat piksel (irisan tipis ROI)
+        return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+    def _pixel_centers(self, transform, window):
+        r0, r1, c0, c1 = window
+        x0, dx, _, y0, _, dy = transform
+        xs = x0 + (np.arange(c0, c1) + 0.5) * dx
+        ys = y0 + (np.arange(r0, r1) + 0.5) * dy
+        return np.meshgrid(xs, ys)
+
+    # --- Tahap pipeline (lihat sampang.pipeline), per tile ---
+    def build_collection(self, year, tile):
+        bounds = tile.bounds if tile is not None else None
+        scenes = self.scenes(year, bounds)
+        transform, shape = self._grid(scenes)
+        step = self._step(transform)
+        if step > 1:
+            x0, dx, b, y0, d, dy = transform
+            transform = (x0, dx * step, b, y0, d, dy * step)
+            shape = (shape[0] // step, shape[1] // step)
+        window = self._roi_window(transform, shape, bounds)
+        # ROI poligon: hanya piksel yang pusatnya di dalam ROI yang dihitung. Diuji terhadap ROI
+        # utuh (bukan irisan per tile) agar hasilnya sama persis dengan perhitungan tanpa tile
+        roi_mask = None
+        if not (tile is not None and tile.is_box) and not config.ROI.equals(shapely.box(*config.ROI_BOUNDS)):
+            roi_mask = shapely.contains_xy(config.ROI, *self._pixel_centers(transform, window))
+        return {"scenes": scenes, "transform": transform, "shape": shape, "step": step,
+                "window": window, "roi_mask": roi_mask}
+
+    def build_composite(self, year, tile, collection):
+        # Median per piksel secara streaming: tiap blok baris diisi scene demi scene ke satu
+        # buffer (n_scene × baris × kolom), jadi memori kerja dibatasi SAMPANG_COMPOSITE_MB
+        # berapa pun jumlah scene; scene sudah tersaring CLOUDY_PIXEL_PERCENTAGE di koleksi
+        scenes = collection["scenes"]
+        r0, r1, c0, c1 = collection["window"]
+        cols = slice(c0, c1)
+        bands = {band: np.empty((r1 - r0, c1 - c0), dtype="float32") for band in config.NDWI_BANDS}
+        block = min(composite_rows(len(scenes), c1 - c0, self.composite_bytes), max(1, r1 - r0))
+        buffer = np.empty((len(scenes), block, c1 - c0), dtype="float32")  # dipakai ulang tiap blok
+        for start in range(r0, r1, block):
+            rows = slice(start, min(start + block, r1))
+            stack = buffer[:, :rows.stop - rows.start]
+            for band, out in bands.items():
+                for i, scene in enumerate(scenes):
+                    stack[i] = scene.read(band, rows, cols, collection["step"])
+                out[rows.start - r0:rows.stop - r0] = median_stack(stack)
+        metrics.memory("composite", buffer.nbytes * MEDIAN_BYTES // 4 + sum(b.nbytes for b in bands.values()),
+                       year=year, tile=None if tile is None else tile.id, scenes=len(scenes))
+        return {"transform": collection["transform"], "window": collection["window"],
+                "roi_mask": collection["roi_mask"], "bands": bands}
+
+    def build_ndwi(self, year, tile, composite):
+        first, second = (composite["bands"][band] for band in config.NDWI_BANDS)
+        ndwi = normalized_difference(first, second)
+        if composite["roi_mask"] is not None:
+            ndwi[~composite["roi_mask"]] = np.nan
+        return {"transform": composite["transform"], "window": composite["window"], "ndwi": ndwi}
+
+    def build_masks(self, year, tile, ndwi):
+        return {"transform": ndwi["transform"], "window": ndwi["window"],
+                "water": ndwi["ndwi"] > config.NDWI_THRESHOLD,
+                "land": ndwi["ndwi"] <= config.NDWI_THRESHOLD}
+
+    def _conservation_mask(self, transform, window):
+        key = (transform, window)
+        if key not in self._cons_masks:
+            self._cons_masks[key] = shapely.contains_xy(self.conservation, *self._pixel_centers(transform, window))
+            while len(self._cons_masks) > memo_size():
+                self._cons_masks.popitem(last=False)
+        return self._cons_masks[key]
+
+    def masks(self, year, keys=LAYER_KEYS, tile=None):
+        node = self.pipeline.get("masks", year, tile)
+        masks = {"water": node["water"], "land": node["land"]}
+        if "land_cons" in keys:
+            masks["land_cons"] = node["land"] & self._conservation_mask(node["transform"], node["window"])
+        return node["transform"], node["window"], {key: masks[key] for key in keys}
+
+    # --- Hasil: diproses per tile dan digabung secara streaming ---
+    def _tile_sums(self, year, tile):
+        transform, (r0, r1, c0, c1), masks = self.masks(year, tile=tile)
+        area = row_areas(transform, r0, r1)[:, None]
+        return {key: float((masks[key] * area).sum()) for key in LAYER_KEYS}
+
+    def _each_tile(self, func):
+        for tile, result, error in stream_concurrently(func, roi_tiles()):
+            if error is not None:
+                raise error
+            yield tile, result
+
+    def compute_area_stats(self, year):
+        total = {}
+        for _, sums in self._each_tile(lambda tile: self._tile_sums(year, tile)):
+            add_sums(total, sums)
+        return stats_row(year, *(total.get(key) for key in LAYER_KEYS))
+
+    def compute_area_stats_batch(self, years):
+        return [self.compute_area_stats(year) for year in years]
+
+    def _tile_zonal(self, years, tile):
+        nodes = [self.pipeline.get("masks", year, tile) for year in years]
+        transform, window = nodes[0]["transform"], nodes[0]["window"]
+        if any(n["transform"] != transform or n["window"] != window for n in nodes):
+            raise ValueError("Statistik zonal butuh semua tahun di grid yang sama")
+        labels = cached_labels(self.zone_geometries, transform, window, self.conservation_key)
+        codes = state_codes([(n["water"], n["land"]) for n in nodes])
+        area = row_areas(transform, window[0], window[1])[:, None]
+        return label_table(labels, codes, area, len(years))
+
+    def compute_zonal_table(self, years):
+        # Luas per (kawasan, keadaan semua tahun); lihat sampang.zonal
+        table = {}
+        for _, part in self._each_tile(lambda tile: self._tile_zonal(years, tile)):
+            add_sums(table, part)
+        return {"years": list(years), "labels": len(self.zone_geometries), "table": table}
+
+    def _tile_histogram(self, year, tile):
+        node = self.pipeline.get("ndwi", year, tile)
+        transform, (r0, r1, c0, c1) = node["transform"], node["window"]
+        inside = self._conservation_mask(transform, node["window"])
+        area = row_areas(transform, r0, r1)[:, None]
+        return histogram_table(node["ndwi"], inside, area, config.HIST_BINS)
+
+    def compute_histogram(self, year):
+        # Luas per bin NDWI (seluruh ROI & di kawasan konservasi); lihat sampang.histogram
+        table = {}
+        for _, part in self._each_tile(lambda tile: self._tile_histogram(year, tile)):
+            add_sums(table, part)
+        return {"bins": config.HIST_BINS, "table": table}
+
+    def _conservation_geometry(self, transform, window):
+        # Poligon piksel konservasi (pusat piksel di dalam kawasan); sama untuk semua tahun
+        key = ("geometry", transform, window)
+        if key not in self._cons_masks:
+            r0, _, c0, _ = window
+            mask = self._conservation_mask(transform, window)
+            self._cons_masks[key] = vectorize_mask(mask, transform, r0, c0)
+            while len(self._cons_masks) > memo_size():
+                self._cons_masks.popitem(last=False)
+        return self._cons_masks[key]
+
+    def _tile_geometries(self, year, keys, tile):
+        # Hanya air yang divektorisasi; darat = piksel valid − air (tepi ROI/nodata, murah
+        # karena hampir seluruh baris satu run) dan darat konservasi = darat ∩ poligon piksel
+        # konservasi. Batas bersama tersusun dari koordinat yang identik, jadi hasilnya sama
+        # dengan memvektorisasi tiap mask sendiri.
+        node = self.pipeline.get("masks", year, tile)
+        transform, (r0, r1, c0, c1) = node["transform"], node["window"]
+        with metrics.timer("vectorize", year=year, tile=None if tile is None else tile.id):
+            water = vectorize_mask(node["water"], transform, r0, c0)
+            geometries = {"water": water}
+            if "land" in keys or "land_cons" in keys:
+                valid = vectorize_mask(node["water"] | node["land"], transform, r0, c0)
+                geometries["land"] = valid.difference(water)
+            if "land_cons" in keys:
+                cons = self._conservation_geometry(transform, node["window"])
+                geometries["land_cons"] = geometries["land"].intersection(cons)
+        return {key: geometries[key] for key in keys}
+
+    def _tile_piece(self, year, keys, tile):
+        geometries = self._tile_geometries(year, keys, tile)
+        node = self.pipeline.get("masks", year, tile)
+        return node["transform"], window_bounds(node["transform"], node["window"]), geometries
+
+    def layer_geometries(self, year, keys=LAYER_KEYS):
+        # Tile diurutkan agar hasil tidak bergantung pada urutan selesai worker
+        pieces = [piece for _, piece in sorted(self._each_tile(lambda tile: self._tile_piece(year, keys, tile)),
+                                               key=lambda item: item[0].id)]
+        bounds = [b for _, b, _ in pieces]
+        geometries = {key: stitch_geometries([g[key] for _, _, g in pieces], bounds) for key in keys}
+        _, dx, _, _, _, _ = pieces[0][0]
+        return simplify_layers(geometries, config.SIMPLIFY_PX * abs(dx))
+
+    def compute_layers(self, year, keys=LAYER_KEYS):
+        geometries = self.layer_geometries(year, keys)
+        with metrics.timer("geojson", year=year):
+            return {key: geometry_to_geojson(geometry) for key, geometry in geometries.items()}
+
+    def compute_topology(self, year, keys=LAYER_KEYS):
+        # Semua layer satu tahun dalam satu topologi: batas air–darat disimpan sekali
+        geometries = self.layer_geometries(year, keys)
+        with metrics.timer("topology", year=year):
+            return encode_topology(geometries, grid=self.topology_grid(year))
+
+    def topology_grid(self, year):
+        # Ukuran piksel mask (dx, dy): poligon hasil vektorisasi berada di grid ini
+        _, dx, _, _, _, dy = self.pipeline.get("masks", year, roi_tiles()[0])["transform"]
+        return dx, dy
+
+    def mask_grid(self, year):
+        # Grid citra dan jendela ROI utuh yang memuat semua tile (lihat sampang.maskstore)
+        first = self.pipeline.get("collection", year, roi_tiles()[0])
+        return first["transform"], self._roi_window(first["transform"], first["shape"])
+
+    def mask_tiles(self, year):
+        # (jendela di grid mask_grid, air, darat) per tile
+        for _, node in self._each_tile(lambda tile: self.pipeline.get("masks", year, tile)):
+            yield node["window"], node["water"], node["land"]
+
+    def compute_rasters(self, year, colors):
+        # Mask semua tile disusun ke satu gambar ringkas (maks. MAX_OVERLAY_PX) di grid ROI
+        keys = tuple(colors)
+        transform, (R0, R1, C0, C1) = self.mask_grid(year)
+        step = max(1, int(np.ceil(max(R1 - R0, C1 - C0) / MAX_OVERLAY_PX)))
+        shape = (-(-(R1 - R0) // step), -(-(C1 - C0) // step))
+        overview = {key: np.zeros(shape, dtype=bool) for key in keys}
+
+        def tile_overview(tile):
+            tile_transform, (r0, r1, c0, c1), masks = self.masks(year, keys, tile)
+            if tile_transform != transform:
+                raise ValueError("Semua scene dalam satu tahun harus berada di grid yang sama")
+            rows = np.arange(r0, r1)
+            cols = np.arange(c0, c1)
+            rows, cols = rows[(rows - R0) % step == 0], cols[(cols - C0) % step == 0]
+            return rows, cols, {key: masks[key][np.ix_(rows - r0, cols - c0)] for key in keys}
+
+        for _, (rows, cols, sampled) in self._each_tile(tile_overview):
+            for key in keys:
+                overview[key][np.ix_((rows - R0) // step, (cols - C0) // step)] = sampled[key]
+
+        x0, dx, _, y0, _, dy = transform
+        xs = (x0 + C0 * dx, x0 + C1 * dx)
+        ys = (y0 + R0 * dy, y0 + R1 * dy)
+        bounds = (min(xs), min(ys), max(xs), max(ys))
+        return {key: mask_to_overlay(overview[key], colors[key], bounds) for key in keys}
@@ -0,0 +1,28 @@
+# Luas piksel geodesik (setara ee.Image.pixelArea) untuk grid EPSG:4326
+import numpy as np
+
+# Elipsoid WGS84
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_E = np.sqrt(WGS84_E2)
+
+
+def _authalic_q(lat_deg):
+    s = np.sin(np.radians(lat_deg))
+    return (1 - WGS84_E2) * (s / (1 - WGS84_E2 * s * s)
+                             - np.log((1 - WGS84_E * s) / (1 + WGS84_E * s)) / (2 * WGS84_E))
+
+
+def cell_area(lat_top, lat_bottom, dlon_deg):
+    # Luas sel lintang-bujur pada elipsoid (m²), vektor terhadap lat_top/lat_bottom
+    q = np.abs(_authalic_q(lat_top) - _authalic_q(lat_bottom))
+    return WGS84_A ** 2 / 2 * q * np.radians(abs(dlon_deg))
+
+
+def row_areas(transform, row_start, row_stop):
+    # Luas satu piksel untuk setiap baris grid (semua kolom dalam satu baris sama luasnya)
+    x0, dx, _, y0, _, dy = transform
+    rows = np.arange(row_start, row_stop, dtype="float64")
+    return cell_area(y0 + rows * dy, y0 + (rows + 1) * dy, dx)
+
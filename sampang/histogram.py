@@ -0,0 +1,53 @@
+# Histogram NDWI berbobot luas per tahun, untuk mengganti ambang air/darat tanpa hitung ulang
+#
+# NDWI [-1, 1] dibagi HIST_BINS bin yang tertutup di kanan, (tepi_i, tepi_i+1]. Setiap piksel
+# valid diberi kode bin + bins × (di kawasan konservasi), lalu luas per kode dihitung dengan
+# SATU bincount (lokal) atau satu reduceRegion ber-group (EE), seperti sampang.zonal. Untuk
+# ambang t di tepi bin, darat (ndwi <= t) = jumlah kumulatif bin di bawah t dan air = sisanya,
+# sama persis dengan mask ndwi > t / ndwi <= t.
+import numpy as np
+
+from . import config
+from .stats import stats_row
+
+NDWI_RANGE = (-1.0, 1.0)
+
+
+def bin_width(bins=None):
+    return (NDWI_RANGE[1] - NDWI_RANGE[0]) / (bins or config.HIST_BINS)
+
+
+def bin_codes(ndwi, inside, bins):
+    # (tepi_i, tepi_i+1] → i (NDWI -1 masuk bin pertama); + bins untuk piksel di kawasan.
+    # float64 agar NDWI positif kecil tidak terbulatkan ke tepi 0
+    scale = bins / (NDWI_RANGE[1] - NDWI_RANGE[0])
+    index = np.ceil((ndwi.astype("float64") - NDWI_RANGE[0]) * scale) - 1
+    return np.clip(index, 0, bins - 1).astype("int64") + bins * inside.astype("int64")
+
+
+def histogram_table(ndwi, inside, area, bins):
+    # Satu bincount: luas (m²) per kode → dict {kode: m²}; piksel NaN (masked) dilewati
+    valid = ~np.isnan(ndwi)
+    codes = bin_codes(ndwi[valid], inside[valid], bins)
+    weights = np.broadcast_to(area, ndwi.shape)[valid]
+    sums = np.bincount(codes, weights=weights, minlength=2 * bins)
+    nonzero = np.flatnonzero(sums)
+    return {int(k): float(sums[k]) for k in nonzero}
+
+
+def decode_histogram(result):
+    # → (luas per bin seluruh ROI, luas per bin di kawasan konservasi), m²
+    bins = result["bins"]
+    dense = np.zeros(2 * bins)
+    for key, value in result["table"].items():
+        dense[int(key)] += value
+    return dense[:bins] + dense[bins:], dense[bins:]
+
+
+def threshold_row(year, result, threshold):
+    # Baris statistik (lihat stats_row) untuk ambang lain; dibulatkan ke tepi bin terdekat
+    roi, inside = decode_histogram(result)
+    bins = result["bins"]
+    edge = int(np.clip(round((threshold - NDWI_RANGE[0]) / bin_width(bins)), 0, bins))
+    land = float(roi[:edge].sum())
+    return stats_row(year, float(roi.sum()) - land, land, float(inside[:edge].sum()))
@@ -0,0 +1,112 @@
+# Helper folium untuk layer hasil backend
+import json
+
+import folium
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from jinja2 import Template
+
+
+def add_raster_layer(m, raster, name, opacity=0.5):
+    if raster["type"] == "tiles":
+        folium.TileLayer(
+            tiles=raster["url"],
+            attr="Google Earth Engine",
+            name=name,
+            overlay=True,
+            opacity=opacity
+        ).add_to(m)
+    else:
+        folium.raster_layers.ImageOverlay(
+            raster["url"],
+            bounds=raster["bounds"],
+            name=name,
+            opacity=opacity
+        ).add_to(m)
+
+
+# --- Layer vektor dari satu topologi (lihat sampang.topology) ---
+# folium.TopoJson menyalin seluruh topologi ke setiap layer; di sini topologi ditulis
+# sekali ke HTML dan tiap layer hanya merujuk objeknya, sehingga arc bersama tetap sekali.
+class TopologyData(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = {{ this.data }};
+        {% endmacro %}
+    """)
+
+    def __init__(self, topology):
+        super().__init__()
+        self._name = "Topology"
+        self.data = json.dumps(topology, separators=(",", ":"))
+
+
+class TopologyLayer(JSCSSMixin, Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson(
+                topojson.feature({{ this.topology.get_name() }}, {{ this.topology.get_name() }}.objects[{{ this.key|tojson }}]),
+                {style: function() { return {{ this.style|tojson }}; }}
+            );
+            {%- if this.tooltip %}
+            {{ this.get_name() }}.bindTooltip({{ this.tooltip|tojson }}, {sticky: true});
+            {%- endif %}
+        {% endmacro %}
+    """)
+
+    default_js = [("topojson", "https://cdnjs.cloudflare.com/ajax/libs/topojson/1.6.9/topojson.min.js")]
+
+    def __init__(self, topology, key, name, style, tooltip=None):
+        super().__init__(name=name, overlay=True)
+        self._name = "TopologyLayer"
+        self.topology = topology
+        self.key = key
+        self.style = style
+        self.tooltip = tooltip
+
+
+def add_topology_layers(m, topology, layers):
+    # layers: [(kunci objek, nama layer, style Leaflet, tooltip atau None)], urutan tetap
+    data = TopologyData(topology)
+    data.add_to(m)
+    for key, name, style, tooltip in layers:
+        if key in topology["objects"]:
+            TopologyLayer(data, key, name, style, tooltip).add_to(m)
+
+
+# --- Layer GeoJSON dari teks jadi (mode viewport, lihat sampang.viewport) ---
+# Teks FeatureCollection hasil query indeks ditulis apa adanya ke skrip peta, tanpa
+# parse dan serialisasi ulang di Python seperti folium.GeoJson
+class GeoJsonText(Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson(
+                {{ this.data }},
+                {style: function() { return {{ this.style|tojson }}; }}
+            );
+            {%- if this.tooltip %}
+            {{ this.get_name() }}.bindTooltip({{ this.tooltip|tojson }}, {sticky: true});
+            {%- endif %}
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, name, style, tooltip=None):
+        super().__init__(name=name, overlay=True, control=False)
+        self._name = "GeoJsonText"
+        self.data = data
+        self.style = style
+        self.tooltip = tooltip
+
+
+def viewport_groups(features, layers):
+    # features: {nama layer: teks GeoJSON}; layers: [(nama layer, style Leaflet, tooltip atau
+    # None)] → FeatureGroup untuk st_folium(feature_group_to_add=...), yang diganti di
+    # browser tanpa memuat ulang peta dasar
+    groups = []
+    for name, style, tooltip in layers:
+        if name in features:
+            group = folium.FeatureGroup(name=name)
+            GeoJsonText(features[name], name, style, tooltip).add_to(group)
+            groups.append(group)
+    return groups
@@ -0,0 +1,151 @@
+# Penyimpanan mask air/darat semua tahun: bit-packed, memory-mapped, di satu grid bersama
+#
+#   <folder>/index.json   geotransform grid, ukuran (baris, kolom), tahun
+#   <folder>/masks.bin    uint8 [baris, ceil(kolom / 8), tahun × 2]: bit air lalu bit darat
+#
+# Satu bit per piksel per tahun per bidang (np.packbits sepanjang kolom). Byte satu piksel
+# untuk semua tahun dan kedua bidang bersebelahan, jadi riwayat satu titik (klik peta)
+# dijawab dengan satu pembacaan 2 × n_tahun byte dari file memmap, tanpa query backend.
+# Luas perubahan seluruh grid dihitung per blok baris dengan AND + popcount pada byte
+# terpak, berbobot luas piksel per baris (lihat sampang.geodesy).
+import os
+import tempfile
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .cache import cache_key
+from .engine_artifacts import read_json, write_json
+from .geodesy import row_areas
+from .periods import is_closed
+from .pipeline import analysis_params
+from .zonal import LAND, NODATA, WATER
+
+STORE_FORMAT = 1
+PLANES = 2  # air, darat; keduanya 0 = tanpa data (di luar ROI / tertutup awan)
+STATE_NAMES = {WATER: "Air", LAND: "Darat", NODATA: "Tanpa data"}
+# Jumlah bit 1 untuk setiap nilai byte
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype="uint8")
+
+
+def _pack_into(target, rows, col_start, mask):
+    # OR-kan mask (baris × kolom) ke byte terpak mulai kolom col_start (tidak harus kelipatan 8)
+    shift = col_start % 8
+    packed = np.packbits(np.pad(mask, ((0, 0), (shift, 0))), axis=1)
+    first = col_start // 8
+    target[rows, first:first + packed.shape[1]] |= packed
+
+
+class MaskStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = read_json(os.path.join(directory, "index.json"))
+        if self.index.get("format") != STORE_FORMAT:
+            raise ValueError(f"Format mask store {self.index.get('format')} tidak didukung")
+        self.years = self.index["years"]
+        self.transform = tuple(self.index["transform"])
+        self.shape = tuple(self.index["shape"])
+        self.bits = np.memmap(os.path.join(directory, "masks.bin"), dtype="uint8", mode="r",
+                              shape=(self.shape[0], -(-self.shape[1] // 8), len(self.years) * PLANES))
+
+    def pixel(self, lon, lat):
+        # (baris, kolom) grid untuk satu koordinat, atau None di luar grid
+        x0, dx, _, y0, _, dy = self.transform
+        row = int(np.floor((lat - y0) / dy))
+        col = int(np.floor((lon - x0) / dx))
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            return None
+        return row, col
+
+    def states(self, lon, lat):
+        # Keadaan piksel (WATER/LAND/NODATA) per tahun; None di luar grid
+        pixel = self.pixel(lon, lat)
+        if pixel is None:
+            return None
+        row, col = pixel
+        cell = np.asarray(self.bits[row, col // 8])  # satu pembacaan: semua tahun & bidang
+        flags = (cell >> (7 - col % 8)) & 1
+        return [WATER if flags[PLANES * i] else LAND if flags[PLANES * i + 1] else NODATA
+                for i in range(len(self.years))]
+
+    def history(self, lon, lat):
+        # Tabel riwayat satu titik untuk ditampilkan; None di luar grid
+        states = self.states(lon, lat)
+        if states is None:
+            return None
+        return pd.DataFrame({"Tahun": self.years, "Keadaan": [STATE_NAMES[s] for s in states]})
+
+    def change_table(self, block_rows=1024):
+        # Luas perubahan air ↔ darat seluruh grid untuk setiap pasangan tahun (ha)
+        pairs = list(combinations(range(len(self.years)), 2))
+        areas = row_areas(self.transform, 0, self.shape[0])
+        totals = np.zeros((len(pairs), 2))
+        for start in range(0, self.shape[0], block_rows):
+            block = np.asarray(self.bits[start:start + block_rows])
+            area = areas[start:start + len(block)]
+            for k, (i, j) in enumerate(pairs):
+                to_land = block[:, :, PLANES * i] & block[:, :, PLANES * j + 1]
+                to_water = block[:, :, PLANES * i + 1] & block[:, :, PLANES * j]
+                totals[k, 0] += POPCOUNT[to_land].sum(axis=1, dtype="int64") @ area
+                totals[k, 1] += POPCOUNT[to_water].sum(axis=1, dtype="int64") @ area
+        return pd.DataFrame({
+            "Dari": [self.years[i] for i, _ in pairs],
+            "Ke": [self.years[j] for _, j in pairs],
+            "Air → Darat (Ha)": (totals[:, 0] / 10000).round(2),
+            "Darat → Air (Ha)": (totals[:, 1] / 10000).round(2),
+        })
+
+
+def build_store(engine, years, directory):
+    # Mask per tile dari backend (engine.mask_grid / engine.mask_tiles) → file memmap.
+    # index.json ditulis terakhir, jadi store yang belum selesai tidak pernah terbaca
+    years = list(years)
+    transform, window = engine.mask_grid(years[0])
+    R0, R1, C0, C1 = (int(v) for v in window)
+    x0, dx, b, y0, d, dy = transform
+    shape = (R1 - R0, C1 - C0)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    bits = np.memmap(tmp, dtype="uint8", mode="w+", shape=(shape[0], -(-shape[1] // 8), len(years) * PLANES))
+    for i, year in enumerate(years):
+        if engine.mask_grid(year) != (transform, window):
+            raise ValueError("Mask store butuh semua tahun di grid yang sama")
+        for (r0, r1, c0, c1), water, land in engine.mask_tiles(year):
+            rows = slice(r0 - R0, r1 - R0)
+            _pack_into(bits[:, :, PLANES * i], rows, c0 - C0, water)
+            _pack_into(bits[:, :, PLANES * i + 1], rows, c0 - C0, land)
+    bits.flush()
+    del bits
+    os.replace(tmp, os.path.join(directory, "masks.bin"))
+    write_json(os.path.join(directory, "index.json"), {
+        "format": STORE_FORMAT, "years": years, "shape": list(shape),
+        "transform": [x0 + C0 * dx, dx, b, y0 + R0 * dy, d, dy], "built": time.time()})
+    return MaskStore(directory)
+
+
+def store_directory(engine, years):
+    # Artefak: store hasil prapemrosesan. Backend lain: satu folder per (backend, sumber data,
+    # tahun, parameter analisis)
+    if engine.name == "artifacts":
+        return os.path.join(engine.directory, "masks")
+    params = {"engine": engine.name, "namespace": engine.pipeline.namespace, "years": list(years),
+              "analysis": analysis_params(engine.scale)}
+    return os.path.join(config.MASK_STORE_DIR, cache_key(params)[:12])
+
+
+def open_store(engine, years):
+    # Artefak: store hasil prapemrosesan. Backend lain: dibangun sekali lalu dipakai ulang;
+    # store dengan periode yang masih berjalan dibangun ulang setelah OPEN_PERIOD_TTL
+    directory = store_directory(engine, years)
+    if engine.name == "artifacts":
+        return MaskStore(directory)
+    index_path = os.path.join(directory, "index.json")
+    if os.path.exists(index_path):
+        built = read_json(index_path).get("built", 0)
+        if all(is_closed(y) for y in years) or time.time() - built < config.OPEN_PERIOD_TTL:
+            return MaskStore(directory)
+    return build_store(engine, years, directory)
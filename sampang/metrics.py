@@ -0,0 +1,225 @@
+# Instrumentasi jalur utama: waktu per tahap, round trip remote (EE), ukuran payload,
+# cache hit/miss, jumlah fitur/vertex tiap layer GeoJSON, dan puncak memori kerja komposit.
+#
+# Semua fungsi aman dipanggil dari thread worker (tanpa st.*). Event terakhir disimpan di
+# memori untuk panel sidebar; total kumulatif bisa ditulis sebagai Prometheus textfile
+# (SAMPANG_METRICS_TEXTFILE) dan setiap event bisa dicatat sebagai log JSON
+# (SAMPANG_METRICS_LOG=1).
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import config
+
+logger = logging.getLogger("sampang.metrics")
+if config.METRICS_LOG and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_lock = threading.Lock()
+_events = deque(maxlen=2000)
+_seq = 0
+_counters = {}   # (nama, label) → total kumulatif
+_gauges = {}     # (nama, label) → nilai terakhir
+
+HELP = {
+    "stage_seconds_total": "Total waktu per tahap (detik)",
+    "stage_runs_total": "Jumlah eksekusi per tahap",
+    "stage_errors_total": "Jumlah tahap yang gagal",
+    "remote_calls_total": "Jumlah round trip ke layanan remote",
+    "remote_seconds_total": "Total waktu round trip remote (detik)",
+    "remote_bytes_total": "Total byte (JSON) yang diterima dari layanan remote",
+    "remote_errors_total": "Jumlah round trip remote yang gagal",
+    "remote_retries_total": "Jumlah percobaan ulang request remote setelah error sementara",
+    "remote_coalesced_total": "Jumlah request yang digabung dengan request identik yang sedang berjalan",
+    "cache_total": "Operasi cache hasil per jenis (hits, misses, writes, ...)",
+    "pipeline_memo_total": "Hit/miss memo pipeline",
+    "layer_features": "Jumlah fitur layer GeoJSON terakhir",
+    "layer_vertices": "Jumlah vertex layer GeoJSON terakhir",
+    "layer_bytes": "Ukuran layer GeoJSON terakhir (byte)",
+    "peak_bytes": "Puncak memori kerja tahap terakhir (byte)",
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _record(event):
+    global _seq
+    with _lock:
+        _seq += 1
+        event = {"seq": _seq, "time": round(time.time(), 3), **event}
+        _events.append(event)
+    if config.METRICS_LOG:
+        logger.info(json.dumps(event, default=str))
+
+
+def count(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(stage, seconds, error=None, **labels):
+    # Catat waktu satu tahap yang diukur sendiri (lihat juga timer)
+    if error is not None:
+        count("stage_errors_total", stage=stage)
+    count("stage_seconds_total", seconds, stage=stage)
+    count("stage_runs_total", stage=stage)
+    _record({"stage": stage, "seconds": round(seconds, 4), "error": error, **labels})
+
+
+@contextmanager
+def timer(stage, **labels):
+    # Waktu dinding satu tahap; tahap yang gagal tetap dicatat (dengan jenis error)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, error, **labels)
+
+
+def remote(kind, func, **labels):
+    # Satu round trip (mis. getInfo/getMapId); ukuran diukur dari JSON hasilnya
+    start = time.perf_counter()
+    try:
+        result = func()
+    except Exception as e:
+        seconds = time.perf_counter() - start
+        count("remote_errors_total", kind=kind)
+        _record({"stage": f"remote.{kind}", "seconds": round(seconds, 4), "error": type(e).__name__, **labels})
+        raise
+    seconds = time.perf_counter() - start
+    size = len(json.dumps(result, default=str))
+    count("remote_calls_total", kind=kind)
+    count("remote_seconds_total", seconds, kind=kind)
+    count("remote_bytes_total", size, kind=kind)
+    _record({"stage": f"remote.{kind}", "seconds": round(seconds, 4), "bytes": size, **labels})
+    return result
+
+
+def memory(stage, nbytes, **labels):
+    # Puncak memori kerja satu tahap (byte), dilaporkan oleh tahap itu sendiri
+    gauge("peak_bytes", nbytes, stage=stage)
+    _record({"stage": f"memory.{stage}", "bytes": int(nbytes), **labels})
+
+
+def max_rss_mb():
+    # Puncak RSS proses sejak mulai (MB); None jika platform tidak mendukung (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def geojson_size(geojson):
+    # (jumlah fitur, jumlah vertex) FeatureCollection GeoJSON; untuk Topology: (jumlah
+    # poligon, jumlah vertex arc — arc bersama dihitung sekali)
+    if geojson.get("type") == "Topology":
+        polygons = sum(len(o.get("arcs", [])) for o in geojson["objects"].values())
+        return polygons, sum(len(arc) for arc in geojson["arcs"])
+
+    def vertices(coords):
+        if coords and isinstance(coords[0], (int, float)):
+            return 1
+        return sum(vertices(c) for c in coords)
+
+    features = geojson.get("features", [])
+    total = 0
+    for feature in features:
+        geometry = feature.get("geometry") or {}
+        total += vertices(geometry.get("coordinates", []))
+    return len(features), total
+
+
+def layer(geojson, **labels):
+    # Catat ukuran layer GeoJSON/topologi yang akan dikirim ke peta
+    features, vertices = geojson_size(geojson)
+    size = len(json.dumps(geojson))
+    gauge("layer_features", features, **labels)
+    gauge("layer_vertices", vertices, **labels)
+    gauge("layer_bytes", size, **labels)
+    _record({"stage": "layer", "features": features, "vertices": vertices, "bytes": size, **labels})
+
+
+def mark():
+    # Titik awal satu run aplikasi; lihat since()
+    with _lock:
+        return _seq, dict(_counters)
+
+
+def since(start):
+    # Event dan selisih counter sejak mark(); di server bersama bisa ikut memuat event sesi lain
+    seq, counters = start
+    with _lock:
+        events = [e for e in _events if e["seq"] > seq]
+        deltas = {key: value - counters.get(key, 0) for key, value in _counters.items()
+                  if value != counters.get(key, 0)}
+    return events, deltas
+
+
+def summarize(deltas):
+    # Ringkasan selisih counter untuk panel: round trip, byte, cache hit/miss
+    summary = {"round_trips": 0, "bytes": 0, "cache_hits": 0, "cache_misses": 0}
+    for (name, labels), value in deltas.items():
+        result = dict(labels).get("result")
+        if name == "remote_calls_total":
+            summary["round_trips"] += value
+        elif name == "remote_bytes_total":
+            summary["bytes"] += value
+        elif name == "cache_total" and result in ("hits", "misses"):
+            summary[f"cache_{result}"] += value
+    return summary
+
+
+def _pipeline_counters():
+    from . import pipeline
+    return {_key("pipeline_memo_total", {"result": name}): value for name, value in pipeline.counters.items()}
+
+
+def prometheus_text():
+    with _lock:
+        samples = {**_counters, **_gauges}
+    samples.update(_pipeline_counters())
+    lines = []
+    for name in sorted({name for name, _ in samples}):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# HELP sampang_{name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE sampang_{name} {kind}")
+        for (sample_name, labels), value in sorted(samples.items()):
+            if sample_name != name:
+                continue
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"sampang_{name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=None):
+    # Ditulis atomik agar node_exporter (textfile collector) tidak membaca file setengah jadi
+    path = path or config.METRICS_TEXTFILE
+    if not path:
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
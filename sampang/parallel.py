@@ -0,0 +1,87 @@
+# Eksekusi paralel untuk pekerjaan per tahun yang saling independen
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import config
+
+
+def run_concurrently(func, items, workers=None):
+    # Hasil dikembalikan dalam urutan items: [(item, hasil, error), ...]
+    # Error tidak dilempar agar bisa dilaporkan per item oleh pemanggil
+    items = list(items)
+    workers = max(1, min(workers or config.WORKERS, len(items) or 1))
+    if workers == 1:
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((item, func(item), None))
+            except Exception as e:
+                outcomes.append((item, None, e))
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sampang") as pool:
+        futures = [pool.submit(func, item) for item in items]
+    outcomes = []
+    for item, future in zip(items, futures):
+        error = future.exception()
+        outcomes.append((item, None if error else future.result(), error))
+    return outcomes
+
+
+def stream_concurrently(func, items, workers=None):
+    # Generator (item, hasil, error) sesuai urutan selesai. Paling banyak `workers`
+    # pekerjaan berjalan bersamaan, sehingga hasil yang belum diagregasi tetap terbatas
+    items = iter(items)
+    workers = max(1, workers or config.WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sampang") as pool:
+        pending = {}
+        for item in items:
+            pending[pool.submit(func, item)] = item
+            if len(pending) >= workers:
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, None if error else future.result(), error
+                for next_item in items:
+                    pending[pool.submit(func, next_item)] = next_item
+                    break
+
+
+# Tunggu sebentar sebelum menampilkan hasil kasar: jika hasil resolusi penuh sudah ada
+# (mis. dari cache), hasil perkiraan tidak perlu ditampilkan sama sekali
+FINAL_GRACE_SECONDS = 0.5
+
+
+def progressive(compute, scales=None, final=None):
+    # Generator (skala, hasil, perkiraan?) dari skala kasar ke halus, diakhiri hasil skala
+    # `final` (default config.SCALE). Perhitungan final berjalan di latar sejak awal, jadi
+    # pass kasar tidak menunda hasil akhir; pass kasar yang gagal atau sudah tersusul
+    # hasil final dilewati. Error pass final dilempar ke pemanggil.
+    final = final or config.SCALE
+    scales = config.PROGRESSIVE_SCALES if scales is None else scales
+    coarse = sorted((s for s in scales if s > final), reverse=True)
+    if not coarse:
+        yield final, compute(final), False
+        return
+
+    # Pool tidak ditunggu saat generator dihentikan (mis. rerun Streamlit): perhitungan final
+    # tetap selesai di latar dan mengisi cache
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sampang-final")
+    try:
+        future = pool.submit(compute, final)
+        wait([future], timeout=FINAL_GRACE_SECONDS)
+        for scale in coarse:
+            if future.done():
+                break
+            try:
+                result = compute(scale)
+            except Exception:
+                continue
+            if future.done():
+                break
+            yield scale, result, True
+        yield final, future.result(), False
+    finally:
+        pool.shutdown(wait=False)
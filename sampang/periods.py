@@ -0,0 +1,47 @@
+# Periode analisis: tahun (int, mis. 2020) atau bulan (str "YYYY-MM")
+import datetime
+
+FREQUENCIES = ("year", "month")
+
+
+def parse(period):
+    # → (tahun, bulan atau None)
+    if isinstance(period, str) and "-" in period:
+        year, month = period.split("-")
+        return int(year), int(month)
+    return int(period), None
+
+
+def date_window(period):
+    year, month = parse(period)
+    if month is None:
+        return f'{year}-01-01', f'{year}-12-31'
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f'{year}-{month:02d}-01', f'{next_year}-{next_month:02d}-01'
+
+
+def is_closed(period, today=None):
+    # Periode yang sudah lewat tidak akan berubah lagi
+    today = today or datetime.date.today()
+    year, month = parse(period)
+    if month is None:
+        return year < today.year
+    return (year, month) < (today.year, today.month)
+
+
+def period_column(period):
+    return "Tahun" if parse(period)[1] is None else "Bulan"
+
+
+def series_periods(start, end=None, freq="year", today=None):
+    # Semua periode dari tahun `start` sampai `end` (default: tahun berjalan), tanpa periode masa depan
+    today = today or datetime.date.today()
+    end = end or today.year
+    if freq == "year":
+        return list(range(start, end + 1))
+    if freq != "month":
+        raise ValueError(f"Frekuensi tidak dikenal: {freq} (pilihan: {', '.join(FREQUENCIES)})")
+    return [f'{year}-{month:02d}'
+            for year in range(start, end + 1)
+            for month in range(1, 13)
+            if (year, month) <= (today.year, today.month)]
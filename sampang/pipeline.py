@@ -0,0 +1,98 @@
+# Pipeline bersama untuk kedua aplikasi: DAG tahap yang dievaluasi malas dan di-memo
+#
+#   collection → composite → ndwi → masks → (statistik / vektor / raster)
+#
+# Setiap node diidentifikasi oleh (backend, tahap, tahun, tile, parameter analisis termasuk
+# skala backend), dan memo-nya berlaku untuk seluruh proses: komposit satu tahun dibangun
+# sekali lalu dipakai bersama oleh statistik, layer, dan aplikasi lain di proses yang sama.
+# Backend menyediakan method build_<tahap>(year, tile, *hasil_tahap_sebelumnya);
+# tile=None berarti seluruh ROI. Jumlah node di memo dibatasi, sehingga ROI besar
+# yang diproses per tile tetap memakai memori terbatas.
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+from . import config, metrics
+from .periods import date_window
+
+DAG = OrderedDict([
+    ("collection", ()),
+    ("composite", ("collection",)),
+    ("ndwi", ("composite",)),
+    ("masks", ("ndwi",)),
+])
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_node_locks = {}
+counters = {"hits": 0, "misses": 0}
+
+
+def analysis_params(scale=None):
+    return (config.COLLECTION_ID, config.roi_key(), config.CLOUD_THRESHOLD,
+            tuple(config.NDWI_BANDS), config.NDWI_THRESHOLD, scale or config.SCALE)
+
+
+def conservation_fingerprint(conservation):
+    digest = hashlib.sha256()
+    if conservation is not None:
+        for wkb in shapely.to_wkb(np.asarray(conservation.geometry.values)):
+            digest.update(wkb)
+    return digest.hexdigest()
+
+
+def memo_size():
+    # Batas memo: nilai SAMPANG_PIPELINE_MEMO, atau cukup untuk semua tile × tahun × tahap di
+    # setiap skala (SCALE + skala progresif) agar satu run tidak mengusir node-nya sendiri
+    if config.PIPELINE_MEMO_SIZE > 0:
+        return config.PIPELINE_MEMO_SIZE
+    from .tiling import roi_tiles
+    return len(roi_tiles()) * len(config.TARGET_YEARS) * len(DAG) * (1 + len(config.PROGRESSIVE_SCALES))
+
+
+def clear():
+    with _memo_lock:
+        _memo.clear()
+        _node_locks.clear()
+
+
+class Pipeline:
+    def __init__(self, backend, namespace=None):
+        self.backend = backend
+        # namespace membedakan sumber data backend yang sama (mis. folder citra lokal)
+        self.namespace = namespace or backend.name
+
+    def key(self, stage, year, tile=None):
+        tile_key = None if tile is None else tile.bounds
+        return (self.namespace, stage, year, tile_key, date_window(year), analysis_params(self.backend.scale))
+
+    def get(self, stage, year, tile=None):
+        key = self.key(stage, year, tile)
+        with _memo_lock:
+            if key in _memo:
+                _memo.move_to_end(key)
+                counters["hits"] += 1
+                return _memo[key]
+            node_lock = _node_locks.setdefault(key, threading.Lock())
+
+        # Thread lain yang meminta node yang sama menunggu hasil ini, bukan menghitung ulang
+        with node_lock:
+            with _memo_lock:
+                if key in _memo:
+                    counters["hits"] += 1
+                    return _memo[key]
+            inputs = [self.get(dep, year, tile) for dep in DAG[stage]]
+            with metrics.timer(stage, year=year, tile=None if tile is None else tile.id):
+                value = getattr(self.backend, f"build_{stage}")(year, tile, *inputs)
+            limit = memo_size()
+            with _memo_lock:
+                counters["misses"] += 1
+                _memo[key] = value
+                while len(_memo) > limit:
+                    old_key, _ = _memo.popitem(last=False)
+                    _node_locks.pop(old_key, None)
+                _node_locks.pop(key, None)
+        return value
@@ -0,0 +1,155 @@
+# Prapemrosesan tanpa Streamlit: SHP, statistik & histogram NDWI per tahun, dan layer
+# air/darat/konservasi ditulis sebagai artefak berversi yang dibaca aplikasi dengan
+# SAMPANG_ENGINE=artifacts.
+#
+#   python -m sampang.precompute --engine ee --output artifacts --workers 4
+#
+# Versi = hash parameter analisis (ROI, tahun, koleksi, ambang, skala, backend, geometri
+# konservasi), jadi menjalankan ulang dengan parameter sama melanjutkan run sebelumnya:
+# artefak yang sudah ada dilewati (--force untuk menghitung ulang). LATEST hanya
+# diperbarui jika semua tugas berhasil, sehingga aplikasi tetap membaca versi lengkap
+# terakhir. Backend EE memakai EE_SERVICE_ACCOUNT/EE_PRIVATE_KEY dari environment,
+# atau kredensial `earthengine authenticate` jika tidak ada.
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from . import config, metrics
+from .cache import cache_key
+from .engine import get_engine
+from .engine_artifacts import (ARTIFACT_FORMAT, histogram_path, layer_path, read_json, stats_path, topology_path,
+                               write_json)
+from .maskstore import build_store
+from .parallel import run_concurrently
+from .pipeline import analysis_params, conservation_fingerprint
+from .stats import LAYER_KEYS
+from .topology import encode_topology
+from .vectorize import geometry_to_geojson
+
+
+def _init_ee():
+    service_account = os.environ.get("EE_SERVICE_ACCOUNT")
+    private_key = os.environ.get("EE_PRIVATE_KEY")
+    if service_account and private_key:
+        from .engine_ee import init_ee
+        init_ee(service_account, private_key)
+    else:
+        import ee
+        ee.Initialize()
+
+
+def run_params(engine_name, years, conservation):
+    return {
+        "format": ARTIFACT_FORMAT,
+        "engine": engine_name,
+        "years": list(years),
+        "analysis": analysis_params(),
+        "conservation": conservation_fingerprint(conservation),
+    }
+
+
+def _outputs(directory, task):
+    kind, year = task
+    if kind == "stats":
+        return [stats_path(directory, year)]
+    if kind == "histogram":
+        return [histogram_path(directory, year)]
+    if kind == "layers":
+        return [layer_path(directory, year, key) for key in LAYER_KEYS] + [topology_path(directory, year)]
+    if kind == "masks":
+        return [os.path.join(directory, "masks", "index.json")]
+    return [os.path.join(directory, "zonal.json")]
+
+
+def precompute(output, years=None, engine_name=None, workers=None, force=False, log=print):
+    # → (folder versi, {tugas: error}); error kosong berarti run lengkap
+    from .data import load_conservation
+    engine_name = engine_name or config.ENGINE
+    years = list(years or config.TARGET_YEARS)
+    if engine_name == "ee":
+        _init_ee()
+
+    conservation = load_conservation(clip=True)
+    params = run_params(engine_name, years, conservation)
+    version = cache_key(params)[:12]
+    directory = os.path.join(output, version)
+    manifest_path = os.path.join(directory, "manifest.json")
+    manifest = read_json(manifest_path) if os.path.exists(manifest_path) else {
+        "format": ARTIFACT_FORMAT, "version": version, "params": params, "tasks": {}}
+    manifest["started"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    os.makedirs(directory, exist_ok=True)
+    conservation.to_file(os.path.join(directory, "conservation.geojson"), driver="GeoJSON")
+
+    tasks = ([("stats", year) for year in years] + [("histogram", year) for year in years]
+             + [("layers", year) for year in years] + [("zonal", None), ("masks", None)])
+    if not force:
+        tasks = [t for t in tasks if not all(os.path.exists(p) for p in _outputs(directory, t))]
+    log(f"Versi {version}: {len(tasks)} tugas ({engine_name}, tahun {', '.join(map(str, years))})")
+
+    engine = get_engine(conservation, name=engine_name)
+
+    def run_task(task):
+        kind, year = task
+        start = time.perf_counter()
+        if kind == "stats":
+            write_json(stats_path(directory, year), engine.compute_area_stats(year))
+        elif kind == "histogram":
+            write_json(histogram_path(directory, year), engine.compute_histogram(year))
+        elif kind == "layers":
+            # Satu vektorisasi per tahun untuk GeoJSON (ekspor) dan topologi (peta)
+            geometries = engine.layer_geometries(year)
+            for key, geometry in geometries.items():
+                write_json(layer_path(directory, year, key), geometry_to_geojson(geometry))
+            write_json(topology_path(directory, year), encode_topology(geometries, grid=engine.topology_grid(year)))
+        elif kind == "masks":
+            # Mask bit-packed semua tahun untuk riwayat piksel (lihat sampang.maskstore)
+            build_store(engine, years, os.path.join(directory, "masks"))
+        else:
+            write_json(os.path.join(directory, "zonal.json"), engine.compute_zonal_table(years))
+        return time.perf_counter() - start
+
+    errors = {}
+    for (kind, year), seconds, error in run_concurrently(run_task, tasks, workers):
+        name = kind if year is None else f"{kind}:{year}"
+        if error is not None:
+            errors[name] = error
+            manifest["tasks"][name] = {"status": "failed", "error": str(error)}
+            log(f"  {name}: gagal ({error})")
+        else:
+            manifest["tasks"][name] = {"status": "done", "seconds": round(seconds, 2)}
+            log(f"  {name}: {seconds:.1f} s")
+
+    manifest["finished"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    manifest["max_rss_mb"] = metrics.max_rss_mb()
+    log(f"Puncak memori proses: {manifest['max_rss_mb']} MB")
+    manifest["complete"] = not errors
+    write_json(manifest_path, manifest)
+    if not errors:
+        with open(os.path.join(output, "LATEST.tmp"), "w") as f:
+            f.write(version)
+        os.replace(os.path.join(output, "LATEST.tmp"), os.path.join(output, "LATEST"))
+    return directory, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hitung statistik & layer ke folder artefak")
+    parser.add_argument("--output", default=config.ARTIFACTS_DIR)
+    parser.add_argument("--engine", choices=("ee", "local"), default=config.ENGINE if config.ENGINE != "artifacts" else "ee")
+    parser.add_argument("--years", help="tahun/periode dipisah koma (default: TARGET_YEARS)")
+    parser.add_argument("--workers", type=int, default=config.WORKERS)
+    parser.add_argument("--force", action="store_true", help="hitung ulang artefak yang sudah ada")
+    args = parser.parse_args(argv)
+
+    # "2020" → tahun, "2020-03" → bulan (lihat sampang.periods)
+    years = [v if "-" in v else int(v) for v in args.years.replace(" ", "").split(",")] if args.years else None
+    directory, errors = precompute(args.output, years, args.engine, args.workers, args.force)
+    if errors:
+        print(f"{len(errors)} tugas gagal; jalankan ulang untuk melanjutkan ({directory})", file=sys.stderr)
+        sys.exit(1)
+    print(f"Artefak lengkap di {directory}")
+
+
+if __name__ == "__main__":
+    main()
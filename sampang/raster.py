@@ -0,0 +1,53 @@
+# Render mask biner → PNG berwarna untuk overlay raster di peta (pengganti vektorisasi)
+import base64
+import struct
+import zlib
+
+import numpy as np
+
+# Batas ukuran gambar overlay; ROI besar diturunkan resolusinya
+MAX_OVERLAY_PX = 2048
+
+
+def _mercator_y(lat):
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def mercator_resample(mask, lat_top, lat_bottom):
+    # Leaflet merentang gambar linear di Web Mercator, jadi baris dipilih ulang
+    # (nearest neighbour) agar lintang tiap baris tetap tepat
+    n = mask.shape[0]
+    y = np.linspace(_mercator_y(lat_top), _mercator_y(lat_bottom), n + 1)
+    centers = (y[:-1] + y[1:]) / 2
+    lat = np.degrees(2 * np.arctan(np.exp(centers)) - np.pi / 2)
+    rows = np.clip(((lat - lat_top) / (lat_bottom - lat_top) * n).astype(int), 0, n - 1)
+    return mask[rows]
+
+
+def hex_to_rgb(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def encode_png(rgba):
+    height, width, _ = rgba.shape
+    raw = b"".join(b"\x00" + rgba[r].tobytes() for r in range(height))
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 9))
+            + chunk(b"IEND", b""))
+
+
+def mask_to_overlay(mask, color, bounds):
+    # bounds = (min_lon, min_lat, max_lon, max_lat) dari tepi piksel terluar
+    step = max(1, int(np.ceil(max(mask.shape) / MAX_OVERLAY_PX)))
+    mask = mercator_resample(mask[::step, ::step], bounds[3], bounds[1])
+    rgba = np.zeros(mask.shape + (4,), dtype="uint8")
+    rgba[mask] = hex_to_rgb(color) + (255,)
+    url = "data:image/png;base64," + base64.b64encode(encode_png(rgba)).decode("ascii")
+    return {"type": "image", "url": url, "bounds": [[bounds[1], bounds[0]], [bounds[3], bounds[2]]]}
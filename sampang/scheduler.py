@@ -0,0 +1,111 @@
+# Penjadwal request EE bersama untuk seluruh proses (semua sesi Streamlit)
+#
+# - Request identik yang sedang berjalan digabung: sesi lain menunggu hasil panggilan
+#   yang sama, bukan mengirim ulang (hasil dibagi, jangan diubah oleh pemanggil).
+# - Paling banyak SAMPANG_EE_CONCURRENCY request berjalan bersamaan dan paling banyak
+#   SAMPANG_EE_RATE request dimulai per detik, agar tetap di bawah kuota EE.
+# - Error sementara (kuota, 429, timeout, koneksi) dicoba ulang dengan backoff
+#   eksponensial + jitter; error lain dan percobaan terakhir dilempar ke pemanggil.
+#
+# Tidak bergantung pada modul ee: objek request cukup punya serialize() (seperti
+# ee.ComputedObject), sehingga bisa diuji dengan backend ee palsu.
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from . import config, metrics
+
+TRANSIENT_MESSAGES = (
+    "too many concurrent", "too many requests", "rate limit", "quota exceeded", "429",
+    "timed out", "timeout", "deadline exceeded", "internal error", "backend error",
+    "service unavailable", "503", "502", "connection reset", "temporarily",
+)
+
+
+def is_transient(error):
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+def request_key(kind, obj, *extra):
+    # Ekspresi EE yang sama (serialize identik) → kunci yang sama
+    serialize = getattr(obj, "serialize", None)
+    text = serialize() if serialize is not None else repr(obj)
+    digest = hashlib.sha256(text.encode("utf-8"))
+    for value in extra:
+        digest.update(repr(value).encode("utf-8"))
+    return kind, digest.hexdigest()
+
+
+class Scheduler:
+    def __init__(self, concurrency=None, rate=None, retries=None, backoff=None,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.concurrency = concurrency or config.EE_CONCURRENCY
+        self.interval = 1.0 / (rate or config.EE_RATE)
+        self.retries = config.EE_RETRIES if retries is None else retries
+        self.backoff = config.EE_BACKOFF if backoff is None else backoff
+        self.sleep = sleep
+        self.clock = clock
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._next_start = 0.0
+
+    def _wait_turn(self):
+        # Jarak antar awal request minimal 1/rate detik
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+    def _call(self, func, kind):
+        for attempt in range(self.retries + 1):
+            with self._slots:
+                self._wait_turn()
+                try:
+                    return func()
+                except Exception as e:
+                    if attempt == self.retries or not is_transient(e):
+                        raise
+            # Slot dilepas selama menunggu agar request lain tetap berjalan
+            metrics.count("remote_retries_total", kind=kind)
+            self.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+
+    def run(self, key, func, kind="request"):
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            metrics.count("remote_coalesced_total", kind=kind)
+            return future.result()
+        try:
+            result = self._call(func, kind)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
@@ -0,0 +1,131 @@
+# Penyimpanan deret waktu statistik luas (append-only, JSON Lines)
+#
+# Setiap baris file adalah satu hasil perhitungan periode. Refresh hanya menghitung
+# periode yang belum ada atau yang masih terbuka saat terakhir dihitung (mis. tahun
+# berjalan); hasil baru ditambahkan di akhir file dan entri terakhir per periode yang
+# berlaku. Kunci parameter memisahkan deret dari ROI/parameter/backend yang berbeda.
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from . import config
+from .cache import cache_key
+from .periods import is_closed, series_periods
+
+# Jumlah periode per panggilan batch (satu round trip EE per batch per tile)
+REFRESH_BATCH = 12
+
+
+class SeriesStore:
+    def __init__(self, path=None):
+        self.path = path or config.SERIES_PATH
+        self._lock = threading.Lock()
+
+    def _records(self):
+        records = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # baris terakhir terpotong (proses terhenti saat menulis)
+                    records[(record["params"], str(record["period"]))] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append(self, records):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self, params, periods, records=None):
+        # Periode yang belum ada atau masih terbuka ketika dihitung
+        records = self._records() if records is None else records
+        return [p for p in periods
+                if (params, str(p)) not in records or not records[(params, str(p))]["closed"]]
+
+    def _compute(self, engine, batch):
+        # → ({periode: baris}, {periode: error}); jika batch gagal, dihitung per periode
+        try:
+            return dict(zip(batch, engine.compute_area_stats_batch(batch))), {}
+        except Exception:
+            rows, errors = {}, {}
+            for period in batch:
+                try:
+                    rows[period] = engine.compute_area_stats(period)
+                except Exception as e:
+                    errors[period] = e
+            return rows, errors
+
+    def refresh(self, engine, periods, params=None):
+        # Periode yang gagal (mis. tanpa citra) tidak disimpan dan dicoba lagi di refresh berikutnya
+        params = params or series_params(engine)
+        errors = {}
+        with self._lock:
+            records = self._records()
+            todo = self.pending(params, periods, records)
+            for start in range(0, len(todo), REFRESH_BATCH):
+                batch = todo[start:start + REFRESH_BATCH]
+                rows, batch_errors = self._compute(engine, batch)
+                errors.update(batch_errors)
+                now = time.time()
+                # Periode terbuka yang hasilnya tidak berubah tidak ditulis ulang, agar file
+                # tidak bertambah di setiap refresh
+                self._append({"params": params, "period": period, "closed": is_closed(period),
+                              "computed_at": now, "row": row}
+                             for period, row in rows.items()
+                             if not _unchanged(records.get((params, str(period))), row, is_closed(period)))
+        return self.frame(params, periods), errors
+
+    def frame(self, params, periods):
+        records = self._records()
+        rows = [records[(params, str(p))]["row"] for p in periods if (params, str(p)) in records]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows)
+
+    def compact(self):
+        # Tulis ulang file dengan hanya entri terakhir per (parameter, periode)
+        with self._lock:
+            records = self._records()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                for record in records.values():
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp, self.path)
+
+
+def _unchanged(record, row, closed):
+    # Baris dibandingkan setelah bolak-balik JSON, sama seperti yang dibaca dari file
+    return record is not None and record["closed"] == closed and record["row"] == json.loads(json.dumps(row))
+
+
+def series_params(engine):
+    return cache_key({
+        "engine": engine.name,
+        "collection": config.COLLECTION_ID,
+        "roi": config.roi_key(),
+        "cloud": config.CLOUD_THRESHOLD,
+        "bands": config.NDWI_BANDS,
+        "threshold": config.NDWI_THRESHOLD,
+        "scale": config.SCALE,
+        "conservation": engine.conservation_key
+    })
+
+
+def load_series(engine, freq=None, start=None, end=None, store=None):
+    freq = freq or config.SERIES_FREQ or "year"
+    periods = series_periods(start or config.SERIES_START, end, freq)
+    # → (DataFrame, {periode: error})
+    return (store or SeriesStore()).refresh(engine, periods)
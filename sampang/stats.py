@@ -0,0 +1,22 @@
+# Format baris tabel statistik (sama untuk semua backend)
+from .periods import period_column
+
+# Layer vektor per tahun: air, darat, darat di kawasan konservasi
+LAYER_KEYS = ("water", "land", "land_cons")
+
+STATS_COLUMNS = ["Tahun", "Luas Air (Ha)", "Luas Darat (Ha)", "Darat di Konservasi (Ha)"]
+
+
+def stats_row(year, water_m2, land_m2, land_cons_m2):
+    # m² → ha; kolom periode "Tahun" (atau "Bulan" untuk periode "YYYY-MM")
+    return {
+        period_column(year): year,
+        "Luas Air (Ha)": round((water_m2 or 0) / 10000, 2),
+        "Luas Darat (Ha)": round((land_m2 or 0) / 10000, 2),
+        "Darat di Konservasi (Ha)": round((land_cons_m2 or 0) / 10000, 2)
+    }
+
+
+def empty_row(year):
+    # Periode yang gagal dihitung: nilai kosong (NaN di tabel/grafik), bukan 0 Ha
+    return {period_column(year): year, "Luas Air (Ha)": None, "Luas Darat (Ha)": None, "Darat di Konservasi (Ha)": None}
@@ -0,0 +1,57 @@
+# Pemecahan ROI besar menjadi tile dan agregasi hasil per tile
+import math
+from collections import namedtuple
+
+import shapely
+
+from . import config
+from .vectorize import merge_seams
+
+# geometry: bagian ROI di dalam tile; is_box: True jika bagian itu persegi penuh
+Tile = namedtuple("Tile", ["id", "bounds", "geometry", "is_box"])
+
+
+def _tile(tile_id, geometry):
+    bounds = tuple(geometry.bounds)
+    return Tile(tile_id, bounds, geometry, geometry.equals(shapely.box(*bounds)))
+
+
+def roi_tiles(roi=None, tile_deg=None, grid_deg=None):
+    roi = config.ROI if roi is None else roi
+    tile_deg = tile_deg or config.TILE_DEG
+    grid_deg = grid_deg or config.GRID_DEG
+    min_lon, min_lat, max_lon, max_lat = roi.bounds
+    # ROI kecil diproses utuh, sama persis dengan perhitungan tanpa tile
+    if max_lon - min_lon <= tile_deg and max_lat - min_lat <= tile_deg:
+        return [_tile((0, 0), roi)]
+
+    # Tepi tile diletakkan pada kelipatan ukuran piksel agar sambungan tile jatuh di tepi piksel
+    size = max(1, round(tile_deg / grid_deg)) * grid_deg
+    x0 = math.floor(min_lon / grid_deg) * grid_deg
+    y0 = math.floor(min_lat / grid_deg) * grid_deg
+    nx = math.ceil((max_lon - x0) / size)
+    ny = math.ceil((max_lat - y0) / size)
+    shapely.prepare(roi)
+    tiles = []
+    for j in range(ny):
+        for i in range(nx):
+            cell = shapely.box(x0 + i * size, y0 + j * size, x0 + (i + 1) * size, y0 + (j + 1) * size)
+            if not roi.intersects(cell):
+                continue
+            part = roi.intersection(cell)
+            if part.area > 0:
+                tiles.append(_tile((i, j), part))
+    return tiles
+
+
+def add_sums(total, part):
+    # Penjumlahan luas per tile secara streaming (dict kunci → m²)
+    for key, value in part.items():
+        total[key] = total.get(key, 0.0) + (value or 0.0)
+    return total
+
+
+def stitch_geometries(geometries, bounds=None):
+    # Gabungkan poligon per tile; poligon yang terpotong sambungan tile disatukan kembali.
+    # bounds: bbox jendela piksel tiap tile → hanya poligon di sambungan yang di-union
+    return merge_seams(geometries, bounds)
@@ -0,0 +1,131 @@
+# Encoding topologi bersama (TopoJSON) untuk layer poligon satu tahun
+#
+# Air, darat, dan darat di konservasi saling berbagi batas: batas air–darat yang sama
+# tidak dikirim dua kali, tetapi disimpan sekali sebagai "arc" yang dirujuk kedua layer
+# (indeks negatif ~i = arc dibaca terbalik). Koordinat dikuantisasi ke grid bilangan bulat
+# dan arc di-encode delta, seperti topojson.topology(..., quantization). Didekode di
+# browser dengan topojson.feature (lihat sampang.mapping.add_topology_layers).
+import numpy as np
+import shapely
+
+QUANTIZATION = 100000
+
+
+def _quantize(coords, translate, scale):
+    q = np.round((coords - translate) / scale).astype(np.int64)
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    return q[keep]
+
+
+def _rings(geometry, translate, scale):
+    # → [[ring, ...] per poligon]; ring terbuka (tanpa titik penutup), minimal 3 titik
+    polygons = []
+    for polygon in shapely.get_parts(geometry):
+        if polygon.is_empty or polygon.geom_type != "Polygon":
+            continue
+        rings = []
+        for ring in [polygon.exterior, *polygon.interiors]:
+            q = _quantize(np.asarray(ring.coords), translate, scale)
+            if len(q) > 1 and np.array_equal(q[0], q[-1]):
+                q = q[:-1]
+            if len(q) >= 3:
+                rings.append(q)
+        if rings:
+            polygons.append(rings)
+    return polygons
+
+
+def _junctions(rings, span):
+    # Titik yang dilewati ring dengan tetangga berbeda → ujung arc; → (id titik, penanda
+    # persimpangan) per ring
+    sizes = [len(r) for r in rings]
+    ids = [r[:, 0] * span + r[:, 1] for r in rings]
+    point = np.concatenate(ids)
+    prev = np.concatenate([np.roll(i, 1) for i in ids])
+    nxt = np.concatenate([np.roll(i, -1) for i in ids])
+    pairs = np.stack([point, np.minimum(prev, nxt), np.maximum(prev, nxt)], axis=1)
+    unique = np.unique(pairs, axis=0)
+    values, counts = np.unique(unique[:, 0], return_counts=True)
+    flags = np.isin(point, values[counts > 1])
+    splits = np.cumsum(sizes)[:-1]
+    return list(zip(ids, np.split(flags, splits)))
+
+
+def encode_topology(geometries, grid=None, quantization=QUANTIZATION):
+    # geometries: {nama layer: geometri (Multi)Polygon} → dict TopoJSON.
+    # grid: ukuran piksel (dx, dy). Poligon hasil vektorisasi mask hanya punya vertex di
+    # sudut piksel, jadi kuantisasi ke grid piksel tidak menggeser apa pun (dan delta arc
+    # menjadi bilangan kecil). Tanpa grid: kuantisasi biasa atas bbox, yang bisa menggeser
+    # vertex hingga setengah langkah.
+    present = [g for g in geometries.values() if g is not None and not g.is_empty]
+    if present:
+        min_x, min_y, max_x, max_y = shapely.total_bounds(present)
+    else:
+        min_x = min_y = max_x = max_y = 0.0
+    translate = np.array([min_x, min_y])
+    if grid is not None:
+        scale = np.abs(np.array(grid, dtype=float))
+    else:
+        scale = np.array([max((max_x - min_x) / (quantization - 1), 1e-12),
+                          max((max_y - min_y) / (quantization - 1), 1e-12)])
+    span = int(np.ceil((max_y - min_y) / scale[1])) + 2  # id titik = qx * span + qy
+
+    layers = {key: _rings(g, translate, scale) if g is not None else [] for key, g in geometries.items()}
+    all_rings = [ring for polygons in layers.values() for rings in polygons for ring in rings]
+    ring_ids = iter(_junctions(all_rings, span) if all_rings else [])
+
+    arcs, index = [], {}
+
+    def arc_ref(points, point_ids):
+        key = point_ids.tobytes()
+        if key in index:
+            return index[key]
+        reverse = point_ids[::-1].tobytes()
+        if reverse in index:
+            return ~index[reverse]
+        index[key] = len(arcs)
+        arcs.append(np.concatenate([points[:1], np.diff(points, axis=0)]).tolist())
+        return index[key]
+
+    def encode_ring(ring):
+        point_ids, junction = next(ring_ids)
+        cuts = np.flatnonzero(junction)
+        if not len(cuts):
+            # Ring tanpa persimpangan: satu arc tertutup, diputar ke titik terkecil agar
+            # ring yang sama (mis. lubang air = tepi luar darat) dikenali
+            cuts = np.array([int(np.argmin(point_ids))])
+        start = cuts[0]
+        ring = np.roll(ring, -start, axis=0)
+        point_ids = np.roll(point_ids, -start)
+        cuts = np.append(cuts - start, len(ring))
+        closed = np.vstack([ring, ring[:1]])
+        closed_ids = np.append(point_ids, point_ids[0])
+        return [arc_ref(closed[a:b + 1], closed_ids[a:b + 1]) for a, b in zip(cuts[:-1], cuts[1:])]
+
+    objects = {}
+    for key, polygons in layers.items():
+        encoded = [[encode_ring(ring) for ring in rings] for rings in polygons]
+        objects[key] = {"type": "MultiPolygon", "arcs": encoded}
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": objects,
+        "arcs": arcs,
+    }
+
+
+def decode_object(topology, key):
+    # TopoJSON → geometri shapely (untuk ekspor/pengujian, setara topojson.feature)
+    scale = np.array(topology["transform"]["scale"])
+    translate = np.array(topology["transform"]["translate"])
+    arcs = [np.cumsum(np.array(arc), axis=0) * scale + translate for arc in topology["arcs"]]
+
+    def ring(refs):
+        points = [arcs[r] if r >= 0 else arcs[~r][::-1] for r in refs]
+        return np.concatenate([points[0]] + [p[1:] for p in points[1:]])
+
+    polygons = [shapely.Polygon(ring(rings[0]), [ring(r) for r in rings[1:]])
+                for rings in topology["objects"][key]["arcs"]]
+    return shapely.MultiPolygon(polygons) if polygons else shapely.MultiPolygon()
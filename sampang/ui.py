@@ -0,0 +1,547 @@
+# Bagian halaman Streamlit yang dipakai bersama kedua aplikasi (konservasisampang.py dan
+# sampang_ndwi_konversi.py). Hanya diimpor oleh aplikasi: modul lain di paket ini tidak
+# bergantung pada streamlit
+import itertools
+import json
+import time
+from functools import partial
+
+import folium
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from . import config, get_engine, load_conservation, metrics
+from .histogram import bin_width, threshold_row
+from .mapping import add_raster_layer, add_topology_layers, viewport_groups
+from .maskstore import open_store, store_directory
+from .parallel import progressive, run_concurrently
+from .series import load_series
+from .stats import empty_row
+from .topology import decode_object
+from .viewport import ViewportIndex, map_view
+from .zonal import zonal_frames
+
+VIEWPORT_ZOOM = 14  # zoom awal peta kedua aplikasi
+
+
+# --- Data kawasan konservasi & backend perhitungan (EE, NumPy lokal, atau artefak; lihat
+# SAMPANG_ENGINE) ---
+
+@st.cache_resource
+def init_ee():
+    try:
+        # Cek apakah ada secrets (di Streamlit Cloud)
+        service_account = st.secrets["EE_SERVICE_ACCOUNT"]
+        private_key = st.secrets["EE_PRIVATE_KEY"]
+
+        from .engine_ee import init_ee as init_ee_session
+        init_ee_session(service_account, private_key)
+        print("✅ GEE: Berhasil login dengan Service Account")
+    except Exception:
+        st.error("Gagal login ke Google Earth Engine. Pastikan secrets sudah benar.")
+        st.stop()
+
+
+@st.cache_data
+def load_shp_data():
+    try:
+        if config.ENGINE == "artifacts":
+            # Mode artefak: kawasan konservasi ikut dibaca dari hasil prapemrosesan
+            from .engine_artifacts import read_conservation
+            gdf_clipped = read_conservation()
+        else:
+            gdf_clipped = load_conservation(clip=True)
+
+        if gdf_clipped.empty:
+            return None
+        return gdf_clipped
+    except Exception as e:
+        st.error(f"Error membaca atau memotong SHP: {e}")
+        return None
+
+
+# Satu backend per skala analisis (meter); None = skala penuh config.SCALE
+@st.cache_resource
+def get_area_engine(scale=None):
+    # Login EE ditunda sampai backend benar-benar dibutuhkan
+    if config.ENGINE == "ee":
+        init_ee()
+    try:
+        return get_engine(load_shp_data(), scale=scale)
+    except Exception as e:
+        st.error(f"Gagal menyiapkan backend {config.ENGINE}: {e}")
+        return None
+
+
+def area_engine(scale):
+    return get_area_engine(None if scale == config.SCALE else scale)
+
+
+def area_engines():
+    # {skala: backend}. Mode progresif (SAMPANG_PROGRESSIVE) menambah backend skala kasar untuk
+    # hasil perkiraan; artefak hanya ada di skala penuh
+    engine = get_area_engine()
+    if engine is None:
+        st.stop()
+    engines = {config.SCALE: engine}
+    if config.ENGINE != "artifacts":
+        for scale in config.PROGRESSIVE_SCALES:
+            coarse_engine = get_area_engine(scale)
+            if coarse_engine is not None:
+                engines[scale] = coarse_engine
+    return engines
+
+
+# Fungsi berikut bisa dipanggil dari thread worker, jadi tidak memanggil st.* di dalamnya.
+# Error tidak ditangkap: st.cache_data tidak menyimpan error, jadi kegagalan (mis. EE sedang
+# sibuk) dilaporkan per tahun oleh thread utama dan dicoba lagi di rerun, bukan disimpan sebagai 0
+@st.cache_data(show_spinner=False)
+def compute_area_stats(year, scale=config.SCALE):
+    return area_engine(scale).compute_area_stats(year)
+
+
+@st.cache_data(show_spinner=False)
+def compute_all_area_stats(years, scale=config.SCALE):
+    # Satu round trip untuk semua tahun
+    return area_engine(scale).compute_area_stats_batch(list(years))
+
+
+@st.cache_data(show_spinner=False)
+def compute_histogram(year, scale=config.SCALE):
+    # Histogram NDWI berbobot luas (lihat sampang.histogram) untuk slider ambang
+    return area_engine(scale).compute_histogram(year)
+
+
+@st.cache_data(show_spinner=False)
+def compute_zonal_stats(years, scale=config.SCALE):
+    # Luas & transisi per kawasan dari satu raster label (lihat sampang.zonal)
+    return zonal_frames(area_engine(scale).compute_zonal_table(list(years)), load_shp_data())
+
+
+# Deret waktu (SAMPANG_SERIES): hanya periode yang belum ada atau masih berjalan yang
+# dihitung saat refresh
+@st.cache_data(ttl=config.OPEN_PERIOD_TTL, show_spinner=False)
+def load_stats_series():
+    return load_series(get_area_engine())
+
+
+_layer_versions = itertools.count()
+
+
+# Layer per tahun disimpan sebagai resource (tanpa salinan) agar rerun tidak membaca ulang
+# GeoJSON besar dari cache disk; error tidak di-cache sehingga dicoba lagi di rerun berikutnya.
+# colors: {kunci layer: warna} tahun ini. → (versi, layer); versi baru setiap kali layer
+# dihitung ulang (mis. tahun berjalan setelah TTL), sehingga bisa dipakai sebagai kunci peta
+@st.cache_resource(ttl=config.OPEN_PERIOD_TTL, show_spinner=False)
+def load_year_layers(year, scale, colors):
+    if config.LAYER_MODE == "raster":
+        # Mask dirender sebagai raster; vektorisasi hanya saat ekspor poligon
+        layers = area_engine(scale).compute_rasters(year, colors)
+    else:
+        # Semua layer tahun ini dalam satu topologi (batas bersama dikirim sekali)
+        layers = area_engine(scale).compute_topology(year, keys=tuple(colors))
+    return next(_layer_versions), layers
+
+
+def threshold_slider():
+    # Ambang NDWI: luas air/darat dihitung ulang dari histogram per tahun (lihat
+    # collect_results), tanpa panggilan backend baru; langkah slider = lebar satu bin
+    return st.sidebar.slider("Ambang NDWI (air: NDWI > ambang)", min_value=-1.0, max_value=1.0,
+                             value=float(config.NDWI_THRESHOLD), step=bin_width(), format="%.3f")
+
+
+def collect_results(outcomes, scale, approximate, years, threshold, year_stats, series=None, columns=None):
+    # outcomes: hasil run_concurrently untuk tugas (jenis, tahun, skala): "stats" (semua tahun
+    # sekaligus), "zonal" (opsional), serta "layers" dan "histogram" per tahun.
+    # year_stats(tahun, skala) → baris statistik, dipakai jika statistik gabungan gagal;
+    # series() → (tabel deret waktu, error per periode) jika SAMPANG_SERIES aktif;
+    # columns: kolom luas yang ditampilkan (default semua).
+    # → (peringatan, tabel statistik, data zonal atau None, [(tahun, layer)]). Error pass
+    # perkiraan tidak dilaporkan karena hasil skala penuh menyusul; deret waktu hanya untuk skala penuh
+    notes = []
+    by_kind = {}
+    for (kind, year, _), value, error in outcomes:
+        by_kind.setdefault(kind, []).append((year, value, error))
+
+    (_, stats_data, stats_error), = by_kind["stats"]
+    if stats_error is not None:
+        if approximate:
+            stats_data = [empty_row(year) for year in years]
+        else:
+            # Jika gabungan gagal, hitung per tahun agar error per tahun terlihat
+            notes.append(f"Gagal hitung statistik gabungan, dihitung per tahun: {stats_error}")
+            stats_data = []
+            for year, row, error in run_concurrently(lambda y: year_stats(y, scale), years):
+                if error is not None:
+                    notes.append(f"Gagal hitung statistik {year}: {error}")
+                    row = empty_row(year)
+                stats_data.append(row)
+
+    zonal_data = None
+    if "zonal" in by_kind:
+        (_, zonal_data, zonal_error), = by_kind["zonal"]
+        if zonal_error is not None and not approximate:
+            notes.append(f"Gagal hitung statistik per kawasan: {zonal_error}")
+
+    df_stats = pd.DataFrame(stats_data)
+    if config.SERIES_FREQ and series is not None and not approximate:
+        try:
+            df_series, series_errors = series()
+            if series_errors:
+                periods = ", ".join(str(p) for p in series_errors)
+                notes.append(f"Gagal hitung statistik periode {periods}: {next(iter(series_errors.values()))}")
+            if not df_series.empty:
+                df_stats = df_series
+        except Exception as e:
+            notes.append(f"Gagal memperbarui deret waktu: {e}")
+
+    if threshold != config.NDWI_THRESHOLD:
+        rows = []
+        for year, histogram, error in by_kind.get("histogram", []):
+            if error is not None:
+                if not approximate:
+                    notes.append(f"Gagal hitung histogram NDWI {year}: {error}")
+                rows.append(empty_row(year))
+                continue
+            rows.append(threshold_row(year, histogram, threshold))
+        df_stats = pd.DataFrame(rows)
+
+    if columns is not None:
+        # Kolom pertama adalah kolom periode ("Tahun" atau "Bulan")
+        df_stats = df_stats[[df_stats.columns[0]] + list(columns)]
+
+    map_layers = []
+    for year, layers, error in by_kind.get("layers", []):
+        if error is not None:
+            if not approximate:
+                notes.append(f"Gagal proses layer untuk {year}: {error}")
+            continue
+        map_layers.append((year, layers))
+    return notes, df_stats, zonal_data, map_layers
+
+
+def show_status(slot, notes, scale, approximate):
+    # Banner perkiraan dan peringatan pass ini (banner pass sebelumnya dihapus)
+    slot.empty()
+    if approximate or notes:
+        with slot.container():
+            if approximate:
+                st.info(f"⏳ Menampilkan perkiraan skala {scale} m; hasil {config.SCALE} m sedang dihitung dan akan menggantikannya.")
+            for note in notes:
+                st.warning(note)
+
+
+def run_progressive(fetch_all, engines, status_slot, show, **options):
+    # Isi halaman per pass mode progresif: hasil perkiraan (skala kasar) lalu skala penuh.
+    # fetch_all(skala) → outcomes (lihat collect_results, yang menerima options);
+    # show(skala, perkiraan?, tabel statistik, data zonal, layer peta) mengisi slot peta &
+    # statistik. → nilai show pass terakhir
+    shown = None
+    for scale, outcomes, approximate in progressive(fetch_all, tuple(engines)):
+        notes, df_stats, zonal_data, map_layers = collect_results(outcomes, scale, approximate, **options)
+        show_status(status_slot, notes, scale, approximate)
+        shown = show(scale, approximate, df_stats, zonal_data, map_layers)
+    return shown
+
+
+# --- Mode viewport (SAMPANG_LAYER_MODE=viewport): peta dasar tetap, fitur di viewport yang
+# dilaporkan st_folium dikirim sebagai layer dinamis (lihat sampang.viewport) ---
+
+# Indeks dibangun sekali per kumpulan layer (objek topologi yang sama → indeks yang sama).
+# Argumen berawalan _ tidak di-hash Streamlit: index_key harus menentukan isinya
+@st.cache_resource(max_entries=2, show_spinner=False)
+def build_viewport_index(index_key, _base_layers, _year_layers, _layer_specs):
+    layers = list(_base_layers)
+    for year, topology in _year_layers:
+        for key, name, _, _ in _layer_specs(year):
+            if key in topology["objects"]:
+                layers.append((name, decode_object(topology, key), None))
+    with metrics.timer("viewport_index"):
+        return ViewportIndex(layers)
+
+
+def viewport_map(map_key, year_layers, returned_objects, base_map, base_layers, layer_specs, shown_layers, height):
+    # Peta dasar base_map (tanpa data) + layer dinamis hasil query viewport terakhir.
+    # base_layers: [(nama, geometri, properti per geometri, add_layer(grup, GeoJSON))] yang
+    # sama untuk semua tahun (mis. kawasan konservasi); layer_specs(tahun) → [(kunci
+    # topologi, nama layer, style, tooltip)]. → (keadaan st_folium, ukuran GeoJSON terkirim)
+    from streamlit_folium import st_folium
+    # Nama layer tetap ikut kunci agar aplikasi berbeda di satu proses tidak berbagi indeks
+    index_key = (map_key, tuple(name for name, _, _, _ in base_layers))
+    index = build_viewport_index(index_key, [layer[:3] for layer in base_layers], year_layers, layer_specs)
+    bounds, zoom = map_view(st.session_state.get("peta"), config.ROI_BOUNDS, VIEWPORT_ZOOM)
+    with metrics.timer("viewport_query"):
+        features = index.query(bounds, zoom, names=shown_layers)
+    size = sum(len(text) for text in features.values())
+    metrics.gauge("viewport_bytes", size)
+    groups = []
+    for name, _, _, add_layer in base_layers:
+        if name in features:
+            group = folium.FeatureGroup(name=name)
+            add_layer(group, json.loads(features[name]))
+            groups.append(group)
+    groups += viewport_groups(features, [(name, style, tooltip) for year, _ in year_layers
+                                         for _, name, style, tooltip in layer_specs(year)])
+    state = st_folium(base_map, key="peta", height=height, use_container_width=True,
+                      feature_group_to_add=groups, returned_objects=returned_objects)
+    return state, size
+
+
+# --- Riwayat piksel: klik peta → keadaan air/darat titik itu di semua tahun, dibaca dari
+# mask store bit-packed (lihat sampang.maskstore), tanpa query backend ---
+
+def click_history_toggle():
+    # Peta interaktif (st_folium) dirender ulang di setiap rerun, jadi hanya aktif jika diminta
+    return st.sidebar.toggle("🕓 Riwayat piksel (klik peta)", value=False)
+
+
+# Satu store per folder (backend, sumber data, tahun, parameter analisis)
+@st.cache_resource(ttl=config.OPEN_PERIOD_TTL, show_spinner="Menyiapkan mask store…")
+def load_mask_store(directory, _engine, years):
+    return open_store(_engine, list(years))
+
+
+@st.cache_data(ttl=config.OPEN_PERIOD_TTL, show_spinner=False)
+def store_changes(directory, _store):
+    return _store.change_table()
+
+
+def show_pixel_history(map_state, engine, years):
+    # Panel sidebar untuk titik terakhir yang diklik di peta (map_state dari st_folium)
+    with st.sidebar:
+        st.subheader("🕓 Riwayat Piksel")
+        clicked = (map_state or {}).get("last_clicked")
+        if not clicked:
+            st.caption("Klik peta untuk melihat keadaan air/darat titik itu di semua tahun.")
+            return
+        try:
+            store = load_mask_store(store_directory(engine, years), engine, tuple(years))
+            st.caption(f"Titik {clicked['lat']:.5f}, {clicked['lng']:.5f}")
+            history = store.history(clicked["lng"], clicked["lat"])
+            if history is None:
+                st.caption("Titik berada di luar ROI.")
+            else:
+                st.dataframe(history, use_container_width=True, hide_index=True)
+            st.caption("Perubahan air ↔ darat seluruh ROI")
+            st.dataframe(store_changes(store.directory, store), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.warning(f"Gagal membaca mask store: {e}")
+
+
+# --- Instrumentasi: waktu tahap, round trip EE, payload, cache (lihat sampang.metrics) ---
+
+def metrics_toggle():
+    return st.sidebar.toggle("📊 Instrumentasi", value=False)
+
+
+def finish_metrics(show, run_start, page_started, map_bytes):
+    # Akhir run: waktu halaman dicatat dan textfile Prometheus ditulis; jika show, ringkasan
+    # run ini (sejak metrics.mark() run_start) tampil di sidebar
+    metrics.observe("page", time.perf_counter() - page_started)
+    run_events, run_deltas = metrics.since(run_start)
+    try:
+        metrics.write_textfile()
+    except OSError as e:
+        st.sidebar.warning(f"Gagal menulis metrik Prometheus: {e}")
+
+    if show:
+        with st.sidebar:
+            summary = metrics.summarize(run_deltas)
+            st.metric("Round trip remote", summary["round_trips"])
+            st.metric("Data diterima (KB)", round(summary["bytes"] / 1024, 1))
+            st.metric("Cache hit / miss", f'{summary["cache_hits"]} / {summary["cache_misses"]}')
+            st.metric("Data peta (KB)", round(map_bytes / 1024, 1))
+            st.metric("Puncak memori proses (MB)", metrics.max_rss_mb())
+            if run_events:
+                st.dataframe(pd.DataFrame(run_events).drop(columns=["seq", "time"]), use_container_width=True, hide_index=True)
+
+
+# --- Halaman peta + statistik kedua aplikasi (lihat MapPage) ---
+
+# Peta dibangun & diserialisasi sekali per kumpulan layer; rerun (widget) memakai HTML yang
+# sama sehingga tidak ada render ulang folium, dan Streamlit hanya mengirim referensi hash
+# elemen yang sudah dimiliki browser. Toggle layer ditangani LayerControl di browser.
+# Satu entri per kumpulan layer; mode progresif menambah satu entri per skala kasar
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_map_html(map_key, _page, _year_layers, suffix=""):
+    m = _page.make_map(_year_layers, suffix)
+    with metrics.timer("map_build"):
+        return m.get_root().render()
+
+
+class MapPage:
+    # Bagian yang berbeda per aplikasi:
+    # name: pembeda cache peta antar aplikasi dalam satu proses
+    # layers: [(kunci layer, label, {tahun: warna}, tebal garis, opasitas, tooltip?)], urutan tampil
+    # tiles: argumen folium.TileLayer peta dasar selain OpenStreetMap
+    # conservation_layer, add_conservation(parent, data), conservation_fields: nama layer kawasan
+    # konservasi, fungsi yang menggambarnya, dan kolom tooltip/popup-nya
+    # height: tinggi peta (px); zonal: statistik per kawasan; chart: (judul, kolom) grafik batang;
+    # columns: kolom luas di tabel (default semua)
+    def __init__(self, name, layers, tiles, conservation_layer, add_conservation, conservation_fields,
+                 height, zonal=False, chart=None, columns=None):
+        self.name = name
+        self.layers = layers
+        self.tiles = tiles
+        self.conservation_layer = conservation_layer
+        self.add_conservation = add_conservation
+        self.conservation_fields = conservation_fields
+        self.height = height
+        self.zonal = zonal
+        self.chart = chart
+        self.columns = columns
+        self.years = config.TARGET_YEARS
+        self.shown_layers = None
+
+        self.conservation = load_shp_data()
+        if self.conservation is None or self.conservation.empty:
+            st.warning("Tidak ada data kawasan konservasi di wilayah Sampang atau file tidak ditemukan.")
+            st.stop()
+        centroids = self.conservation.geometry.centroid
+        self.center = [centroids.y.mean(), centroids.x.mean()]
+        self.engines = area_engines()
+        self.engine = self.engines[config.SCALE]
+
+    def labels(self):
+        return {key: label for key, label, _, _, _, _ in self.layers}
+
+    def year_colors(self, year):
+        return {key: colors[year] for key, _, colors, _, _, _ in self.layers}
+
+    def layer_specs(self, year, suffix=""):
+        # (kunci objek topologi, nama layer, style Leaflet, tooltip) per tahun, urutan tetap;
+        # suffix menandai nama layer hasil perkiraan, mis. ", ≈60 m"
+        specs = []
+        for key, label, colors, weight, opacity, tooltip in self.layers:
+            style = {"color": colors[year], "weight": weight, "fillOpacity": opacity, "fillColor": colors[year]}
+            specs.append((key, f"{label} ({year}{suffix})", style, f"{label} - {year}{suffix}" if tooltip else None))
+        return specs
+
+    # --- Statistik, layer, histogram (dan statistik zonal) semua tahun pada satu skala diambil
+    # paralel (SAMPANG_WORKERS) ---
+
+    def fetch_task(self, task):
+        kind, year, scale = task
+        if kind == "stats":
+            return compute_all_area_stats(tuple(self.years), scale)
+        if kind == "zonal":
+            return compute_zonal_stats(tuple(self.years), scale)
+        if kind == "histogram":
+            return compute_histogram(year, scale)
+        return load_year_layers(year, scale, self.year_colors(year))
+
+    def fetch_all(self, scale):
+        tasks = ([("stats", None, scale)] + ([("zonal", None, scale)] if self.zonal else [])
+                 + [("layers", year, scale) for year in self.years]
+                 + [("histogram", year, scale) for year in self.years])
+        return run_concurrently(self.fetch_task, tasks)
+
+    def make_map(self, year_layers, suffix="", conservation=True):
+        # conservation=False untuk peta dasar mode viewport (kawasan dikirim bersama layer lain
+        # sesuai viewport)
+        m = folium.Map(location=self.center, zoom_start=VIEWPORT_ZOOM, tiles=None)
+        folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
+        for tile in self.tiles:
+            folium.TileLayer(**tile).add_to(m)
+
+        if conservation:
+            self.add_conservation(m, self.conservation)
+
+        for year, layers in year_layers:
+            if config.LAYER_MODE == "raster":
+                for key, name, style, _ in self.layer_specs(year, suffix):
+                    add_raster_layer(m, layers[key], name, opacity=style["fillOpacity"])
+                continue
+            metrics.layer(layers, year=year, layer="topology")
+            add_topology_layers(m, layers, self.layer_specs(year, suffix))
+
+        folium.LayerControl(collapsed=False).add_to(m)
+        folium.LatLngPopup().add_to(m)
+        return m
+
+    def layer_picker(self):
+        # Mode viewport: pilihan layer di sidebar karena layer dinamis tidak tercatat di LayerControl
+        if config.LAYER_MODE != "viewport":
+            return
+        names = [self.conservation_layer] + [name for year in self.years for _, name, _, _ in self.layer_specs(year)]
+        self.shown_layers = st.sidebar.multiselect("🗺️ Layer peta", names, default=names)
+
+    def base_layers(self):
+        # Kawasan konservasi dikirim bersama layer tahunan sesuai viewport (lihat viewport_map)
+        display = self.conservation.drop(columns="geometry")
+        if 'LUASHA' in display.columns:
+            display['LUASHA'] = pd.to_numeric(display['LUASHA'], errors='coerce')
+        fields = [c for c in dict.fromkeys(self.conservation_fields) if c in display.columns]
+        display = display[fields].astype(str).replace('<NA>', '').replace('nan', '-')
+        return [(self.conservation_layer, self.conservation.geometry.values,
+                 display.to_dict("records"), self.add_conservation)]
+
+    def show_results(self, map_slot, stats_slot, threshold, click_history, scale, approximate, df_stats, zonal_data, map_layers):
+        # → (keadaan peta st_folium atau None, ukuran data peta)
+        map_state = None
+        # Versi layer (lihat load_year_layers) menentukan isi peta
+        map_key = (self.name, config.LAYER_MODE, scale, tuple((year, version) for year, (version, _) in map_layers))
+        map_layers = [(year, layers) for year, (_, layers) in map_layers]
+        # Mode viewport hanya untuk hasil skala penuh; perkiraan tampil sebagai peta statis
+        dynamic_map = config.LAYER_MODE == "viewport" and not approximate
+        if not dynamic_map:
+            try:
+                map_html = build_map_html(map_key, self, map_layers, f", ≈{scale} m" if approximate else "")
+            except Exception as e:
+                st.error(f"Gagal membuat peta: {e}")
+                st.stop()
+            map_bytes = len(map_html)
+            metrics.gauge("map_html_bytes", map_bytes)
+
+        with map_slot.container():
+            with metrics.timer("map_render"):
+                if dynamic_map:
+                    # Viewport (dan klik, jika riwayat piksel aktif) dikirim balik → rerun per geser/zoom
+                    try:
+                        map_state, map_bytes = viewport_map(
+                            map_key, map_layers, ["bounds", "zoom"] + (["last_clicked"] if click_history else []),
+                            self.make_map([], conservation=False), self.base_layers(), self.layer_specs,
+                            self.shown_layers, self.height)
+                    except Exception as e:
+                        st.error(f"Gagal membuat peta: {e}")
+                        st.stop()
+                elif click_history and not approximate:
+                    # Hanya koordinat klik yang dikirim balik (satu rerun per klik)
+                    from streamlit_folium import st_folium
+                    map_state = st_folium(self.make_map(map_layers), key="peta", height=self.height,
+                                          use_container_width=True, returned_objects=["last_clicked"])
+                else:
+                    # Hasil interaksi peta tidak dipakai, jadi peta ditampilkan sebagai komponen
+                    # statis: klik/geser peta tidak memicu rerun skrip
+                    components.html(map_html, height=self.height)
+
+        with stats_slot.container():
+            st.subheader("📊 Statistik Perubahan Wilayah")
+            if approximate:
+                st.caption(f"≈ Perkiraan skala {scale} m — belum final")
+            if threshold != config.NDWI_THRESHOLD:
+                fixed = "peta dan statistik per kawasan" if self.zonal else "peta"
+                st.caption(f"Ambang NDWI {threshold:.3f} (dari histogram); {fixed} memakai ambang {config.NDWI_THRESHOLD}.")
+            st.dataframe(df_stats, use_container_width=True)
+
+            if self.chart:
+                title, column = self.chart
+                st.subheader(title)
+                st.bar_chart(df_stats.set_index(df_stats.columns[0])[[column]])
+
+            if zonal_data is not None:
+                df_zonal, df_transitions = zonal_data
+                st.subheader("🗺️ Statistik per Kawasan Konservasi")
+                st.dataframe(df_zonal, use_container_width=True, hide_index=True)
+                st.subheader("🔄 Transisi Air ↔ Darat per Kawasan")
+                st.dataframe(df_transitions, use_container_width=True, hide_index=True)
+        return map_state, map_bytes
+
+    def run(self, status_slot, map_slot, stats_slot, threshold, click_history):
+        # Isi slot: hasil perkiraan (skala kasar) lalu hasil skala penuh (lihat run_progressive).
+        # → (keadaan peta st_folium atau None, ukuran data peta)
+        show = partial(self.show_results, map_slot, stats_slot, threshold, click_history)
+        return run_progressive(self.fetch_all, self.engines, status_slot, show, years=self.years,
+                               threshold=threshold, year_stats=compute_area_stats,
+                               series=load_stats_series, columns=self.columns)
@@ -0,0 +1,188 @@
+# Konversi mask raster lokal → poligon GeoJSON (pengganti reduceToVectors)
+#
+# Mask besar dibagi menjadi blok baris tetap (SAMPANG_VECTORIZE_BLOCK_ROWS) yang
+# divektorisasi paralel di pool proses bersama; hanya poligon yang menyentuh tepi blok
+# yang disatukan ulang (merge_seams). Pembagian blok tidak bergantung pada jumlah worker,
+# jadi hasilnya identik dengan vektorisasi di satu proses.
+import atexit
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+import numpy as np
+import shapely
+
+from . import config
+
+
+def _row_runs(mask_row):
+    # Pasangan (awal, akhir) dari deretan piksel True dalam satu baris
+    padded = np.concatenate(([False], mask_row, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def mask_to_geometry(mask, transform, row_offset=0, col_offset=0):
+    # Tepi piksel dihitung dari origin grid (x0 + kolom * dx, y0 + baris * dy) sehingga
+    # baris dan tile yang bersebelahan menghasilkan koordinat sambungan yang identik dan
+    # union benar-benar menyatukannya
+    x0, dx, _, y0, _, dy = transform
+    boxes = []
+    for r in range(mask.shape[0]):
+        starts, stops = _row_runs(mask[r])
+        if len(starts) == 0:
+            continue
+        top = y0 + (row_offset + r) * dy
+        bottom = y0 + (row_offset + r + 1) * dy
+        boxes.append(shapely.box(x0 + (col_offset + starts) * dx, bottom, x0 + (col_offset + stops) * dx, top))
+    if not boxes:
+        return shapely.Polygon()
+    return shapely.union_all(np.concatenate(boxes))
+
+
+def window_bounds(transform, window):
+    # Bbox jendela (r0, r1, c0, c1) di grid; rumus tepi sama dengan mask_to_geometry,
+    # sehingga poligon yang menyentuh tepi jendela punya koordinat yang persis sama
+    r0, r1, c0, c1 = window
+    x0, dx, _, y0, _, dy = transform
+    xs = (x0 + c0 * dx, x0 + c1 * dx)
+    ys = (y0 + r0 * dy, y0 + r1 * dy)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def merge_seams(geometries, bounds=None):
+    # Geometri per blok/tile → satu geometri. Poligon yang tidak menyentuh tepi bloknya
+    # tidak berbagi sisi dengan blok lain dan diteruskan apa adanya; hanya poligon di
+    # sambungan yang di-union. Tanpa bounds semua bagian di-union.
+    if bounds is None:
+        parts = [shapely.get_parts(g) for g in geometries if g is not None and not g.is_empty]
+        return shapely.union_all(np.concatenate(parts)) if parts else shapely.Polygon()
+    interior, seam = [], []
+    for geometry, (min_x, min_y, max_x, max_y) in zip(geometries, bounds):
+        if geometry is None or geometry.is_empty:
+            continue
+        # Sisa garis/titik dari difference/intersection tidak punya luas → dibuang
+        geometry_parts = shapely.get_parts(geometry)
+        geometry_parts = geometry_parts[shapely.get_type_id(geometry_parts) == shapely.GeometryType.POLYGON]
+        b = shapely.bounds(geometry_parts)
+        touches = (b[:, 0] <= min_x) | (b[:, 1] <= min_y) | (b[:, 2] >= max_x) | (b[:, 3] >= max_y)
+        interior.append(geometry_parts[~touches])
+        seam.append(geometry_parts[touches])
+    if not interior:
+        return shapely.Polygon()
+    merged = shapely.get_parts(shapely.union_all(np.concatenate(seam)))
+    polygons = np.concatenate(interior + [merged[~shapely.is_empty(merged)]])
+    if len(polygons) == 0:
+        return shapely.Polygon()
+    if len(polygons) == 1:
+        return polygons[0]
+    return shapely.multipolygons(polygons)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_main_lock = threading.Lock()
+
+
+class _WorkerProcess(SpawnProcess):
+    # Worker "spawn" menjalankan ulang modul __main__ induk. Di Streamlit itu adalah skrip
+    # aplikasi, jadi selama worker dimulai modul ini yang dipakai sebagai __main__
+    @staticmethod
+    def _Popen(process_obj):
+        with _main_lock:
+            main = sys.modules["__main__"]
+            sys.modules["__main__"] = sys.modules[__name__]
+            try:
+                return SpawnProcess._Popen(process_obj)
+            finally:
+                sys.modules["__main__"] = main
+
+
+class _WorkerContext(SpawnContext):
+    Process = _WorkerProcess
+
+
+def _process_pool():
+    # Satu pool untuk seluruh proses; "spawn" aman dipakai dari proses yang punya thread
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.VECTORIZE_WORKERS, mp_context=_WorkerContext())
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool(pool=None):
+    # Tanpa argumen: pool aktif (saat proses selesai); dengan pool: hanya jika masih pool aktif
+    global _pool
+    with _pool_lock:
+        if _pool is not None and pool in (None, _pool):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _map_blocks(args):
+    pool = _process_pool()
+    try:
+        return list(pool.map(mask_to_geometry, *args))
+    except BrokenProcessPool:
+        # Worker mati (mis. kehabisan memori): pool dibuat ulang dan blok dicoba sekali lagi
+        _shutdown_pool(pool)
+        return list(_process_pool().map(mask_to_geometry, *args))
+
+
+def vectorize_mask(mask, transform, row_offset=0, col_offset=0, block_rows=None):
+    # Setara mask_to_geometry untuk mask besar: blok baris divektorisasi di pool proses
+    # (SAMPANG_VECTORIZE_WORKERS; 1 = di proses ini) lalu sambungannya disatukan
+    block_rows = block_rows or config.VECTORIZE_BLOCK_ROWS
+    blocks = [(mask[start:start + block_rows], row_offset + start)
+              for start in range(0, mask.shape[0], block_rows)]
+    blocks = [(block, row) for block, row in blocks if block.any()]
+    if not blocks:
+        return shapely.Polygon()
+    if len(blocks) == 1:
+        return mask_to_geometry(blocks[0][0], transform, blocks[0][1], col_offset)
+    args = ([block for block, _ in blocks], [transform] * len(blocks),
+            [row for _, row in blocks], [col_offset] * len(blocks))
+    if config.VECTORIZE_WORKERS > 1:
+        geometries = _map_blocks(args)
+    else:
+        geometries = list(map(mask_to_geometry, *args))
+    cols = (col_offset, col_offset + mask.shape[1])
+    bounds = [window_bounds(transform, (row, row + len(block)) + cols) for block, row in blocks]
+    return merge_seams(geometries, bounds)
+
+
+def simplify_layers(geometries, tolerance):
+    # Penyederhanaan yang menjaga topologi antar layer: air, darat di luar konservasi, dan
+    # darat di konservasi disederhanakan sebagai satu coverage, sehingga batas bersama
+    # tetap berimpit (tanpa celah/tumpang tindih); vertex yang tersisa tetap di sudut piksel
+    if not tolerance:
+        return geometries
+    pieces = dict(geometries)
+    if "land" in pieces and "land_cons" in pieces:
+        pieces["land"] = pieces["land"].difference(pieces["land_cons"])
+    keys = [key for key, g in pieces.items() if g is not None and not g.is_empty]
+    simplified = dict(zip(keys, shapely.coverage_simplify([pieces[key] for key in keys], tolerance)))
+    result = {key: simplified.get(key, pieces[key]) for key in geometries}
+    if "land" in pieces and "land_cons" in pieces:
+        result["land"] = shapely.union_all([result["land"], result["land_cons"]])
+    return result
+
+
+def geometry_to_geojson(geometry, label=1):
+    parts = shapely.get_parts(geometry)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": str(i),
+                "geometry": shapely.geometry.mapping(part),
+                "properties": {"label": label}
+            }
+            for i, part in enumerate(parts) if not part.is_empty
+        ]
+    }
@@ -0,0 +1,127 @@
+# Penyajian fitur peta sesuai viewport (SAMPANG_LAYER_MODE=viewport)
+#
+# Poligon semua layer (air, darat, darat di konservasi per tahun, kawasan konservasi)
+# dipecah per bagian dan diindeks sekali dalam satu STRtree. Setiap geser/zoom peta hanya
+# menjalankan query indeks untuk bbox viewport: bagian yang berpotongan dipotong ke
+# viewport (plus margin) dan disederhanakan dengan toleransi sesuai zoom, lalu dikirim
+# sebagai GeoJSON. Bagian yang lebih kecil dari satu piksel layar tidak dikirim.
+#
+# Bbox query dibulatkan keluar ke grid tile peta pada zoom itu, jadi geseran kecil
+# menghasilkan query (dan GeoJSON) yang sama: hasilnya diambil dari memo indeks dan
+# browser tidak perlu mengganti layer.
+import json
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+from . import config
+
+TILE_PX = 256               # ukuran tile peta Web Mercator (piksel layar)
+VIEWPORT_MARGIN = 0.25      # margin query: fraksi lebar/tinggi viewport di tiap sisi
+QUERY_MEMO_SIZE = 64        # jumlah hasil query yang diingat per indeks
+
+
+def pixel_degrees(zoom):
+    # Lebar satu piksel layar (derajat) pada level zoom
+    return 360.0 / (TILE_PX * 2 ** zoom)
+
+
+def map_view(state, default_bounds, default_zoom):
+    # Nilai "bounds" dan "zoom" dari st_folium → ((min_lon, min_lat, max_lon, max_lat), zoom).
+    # Sebelum peta melapor (atau nilai tidak lengkap) dipakai viewport awal
+    bounds = (state or {}).get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    values = (south_west.get("lng"), south_west.get("lat"), north_east.get("lng"), north_east.get("lat"))
+    zoom = (state or {}).get("zoom")
+    if any(v is None for v in values) or zoom is None:
+        return tuple(default_bounds), default_zoom
+    return values, int(zoom)
+
+
+def snap_bounds(bounds, zoom, margin=VIEWPORT_MARGIN):
+    # Viewport + margin, dibulatkan keluar ke grid tile peta pada level zoom
+    min_x, min_y, max_x, max_y = bounds
+    pad_x, pad_y = (max_x - min_x) * margin, (max_y - min_y) * margin
+    cell = pixel_degrees(zoom) * TILE_PX
+    return (np.floor((min_x - pad_x) / cell) * cell, np.floor((min_y - pad_y) / cell) * cell,
+            np.ceil((max_x + pad_x) / cell) * cell, np.ceil((max_y + pad_y) / cell) * cell)
+
+
+class ViewportIndex:
+    def __init__(self, layers):
+        # layers: [(nama layer, geometri, properti per geometri atau None)], urutan tetap.
+        # geometri: satu (Multi)Polygon atau larik geometri (mis. kolom GeoDataFrame);
+        # properti: list dict sepanjang larik tersebut (mis. atribut kawasan), disimpan sebagai JSON
+        self.names = [name for name, _, _ in layers]
+        parts, owners, properties = [], [], []
+        for layer_id, (_, geometry, props) in enumerate(layers):
+            geometries = np.atleast_1d(np.asarray(geometry, dtype=object))
+            for i, g in enumerate(geometries):
+                if g is None or g.is_empty:
+                    continue
+                pieces = shapely.get_parts(g)
+                parts.append(pieces)
+                owners.append(np.full(len(pieces), layer_id))
+                properties.extend([json.dumps(props[i] if props is not None else {})] * len(pieces))
+        self.parts = np.concatenate(parts) if parts else np.array([], dtype=object)
+        self.owners = np.concatenate(owners) if owners else np.array([], dtype=int)
+        self.properties = properties
+        self.bounds = shapely.bounds(self.parts) if len(self.parts) else np.zeros((0, 4))
+        self.tree = shapely.STRtree(self.parts)
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def query(self, bounds, zoom, names=None):
+        # → {nama layer: teks GeoJSON FeatureCollection} untuk layer `names` (default semua)
+        # di viewport; teks dikirim apa adanya ke peta (lihat sampang.mapping.GeoJsonText)
+        box = snap_bounds(bounds, zoom)
+        names = tuple(self.names if names is None else names)
+        key = (box, zoom, names)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        pixel = pixel_degrees(zoom)
+        hits = np.sort(self.tree.query(shapely.box(*box)))
+        wanted = [self.names.index(name) for name in names if name in self.names]
+        hits = hits[np.isin(self.owners[hits], wanted)]
+        # Bagian yang lebih kecil dari satu piksel layar di kedua arah tidak terlihat
+        size = self.bounds[hits]
+        hits = hits[(size[:, 2] - size[:, 0] >= pixel) | (size[:, 3] - size[:, 1] >= pixel)]
+
+        # Hanya bagian yang melewati tepi query yang dipotong
+        size = self.bounds[hits]
+        inside = ((size[:, 0] >= box[0]) & (size[:, 1] >= box[1]) & (size[:, 2] <= box[2]) & (size[:, 3] <= box[3]))
+        geometries = self.parts[hits].copy()
+        geometries[~inside] = shapely.clip_by_rect(geometries[~inside], *box)
+        tolerance = pixel * config.VIEWPORT_TOLERANCE_PX
+        if tolerance:
+            geometries = shapely.simplify(geometries, tolerance, preserve_topology=True)
+        # Koordinat dibulatkan ke sepersepuluh piksel layar: tidak terlihat, GeoJSON lebih kecil
+        decimals = max(0, math.ceil(-math.log10(pixel / 10)))
+        geometries = shapely.transform(geometries, lambda coords: np.round(coords, decimals))
+
+        keep = ~shapely.is_empty(geometries)
+        hits, geometries = hits[keep], geometries[keep]
+        texts = shapely.to_geojson(geometries)
+        features = {name: [] for name in names}
+        for index, text in zip(hits, texts):
+            features[self.names[self.owners[index]]].append((index, text))
+        result = {name: _feature_collection(items, self.properties) for name, items in features.items()}
+
+        with self._lock:
+            self._memo[key] = result
+            while len(self._memo) > QUERY_MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result
+
+
+def _feature_collection(items, properties):
+    # Teks shapely.to_geojson dirakit langsung (tanpa konversi koordinat di Python)
+    features = ",".join(f'{{"type":"Feature","id":"{index}","geometry":{text},"properties":{properties[index]}}}'
+                        for index, text in items)
+    return f'{{"type":"FeatureCollection","features":[{features}]}}'
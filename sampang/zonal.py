@@ -0,0 +1,133 @@
+# Statistik zonal per kawasan konservasi dan matriks transisi air ↔ darat
+#
+# Kawasan dirasterisasi sekali menjadi raster label (0 = di luar kawasan, i+1 = fitur ke-i)
+# pada grid analisis 10 m. Setiap piksel diberi kode keadaan gabungan semua tahun
+# (basis 3: air=0, darat=1, tanpa data=2), lalu luas per (label, kode) dihitung dengan
+# SATU bincount berbobot luas piksel. Luas air/darat per tahun dan transisi untuk setiap
+# pasangan tahun diturunkan dari tabel itu tanpa membaca piksel lagi.
+import hashlib
+import os
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from . import config
+
+WATER, LAND, NODATA = 0, 1, 2
+STATES = 3
+ZONE_FIELDS = ["NAMOBJ", "KODKWS"]
+
+
+def state_codes(masks_by_year):
+    # masks_by_year: [(water, land), ...] sesuai urutan tahun → kode basis 3 per piksel
+    code = None
+    for i, (water, land) in enumerate(masks_by_year):
+        state = np.full(water.shape, NODATA, dtype="int64")
+        state[water] = WATER
+        state[land] = LAND
+        code = state * STATES ** i if code is None else code + state * STATES ** i
+    return code
+
+
+def rasterize_labels(geometries, transform, window):
+    # Label fitur untuk setiap pusat piksel; fitur yang tumpang tindih → fitur terakhir menang
+    r0, r1, c0, c1 = window
+    x0, dx, _, y0, _, dy = transform
+    labels = np.zeros((r1 - r0, c1 - c0), dtype="int32")
+    xs = x0 + (np.arange(c0, c1) + 0.5) * dx
+    ys = y0 + (np.arange(r0, r1) + 0.5) * dy
+    for i, geometry in enumerate(geometries):
+        if geometry is None or geometry.is_empty:
+            continue
+        # Hanya sub-jendela di sekitar bbox fitur yang diuji
+        minx, miny, maxx, maxy = geometry.bounds
+        cols = np.flatnonzero((xs >= minx) & (xs <= maxx))
+        rows = np.flatnonzero((ys >= miny) & (ys <= maxy))
+        if not len(cols) or not len(rows):
+            continue
+        sub = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+        xx, yy = np.meshgrid(xs[sub[1]], ys[sub[0]])
+        inside = shapely.contains_xy(geometry, xx, yy)
+        labels[sub][inside] = i + 1
+    return labels
+
+
+def cached_labels(geometries, transform, window, key):
+    # Raster label disimpan di disk (per geometri kawasan + grid), dibangun sekali
+    if not config.CACHE_DIR:
+        return rasterize_labels(geometries, transform, window)
+    digest = hashlib.sha256(repr((key, transform, window)).encode("utf-8")).hexdigest()
+    path = os.path.join(config.CACHE_DIR, "labels", f"{digest}.npy")
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+    labels = rasterize_labels(geometries, transform, window)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npy"
+    np.save(tmp, labels)
+    os.replace(tmp, path)
+    return labels
+
+
+def label_table(labels, codes, area, n_years):
+    # Satu bincount: luas (m²) per (label, kode keadaan) → dict {label * K + kode: m²}
+    size = STATES ** n_years
+    index = labels.astype("int64") * size + codes
+    weights = np.broadcast_to(area, labels.shape)
+    sums = np.bincount(index.ravel(), weights=weights.ravel())
+    nonzero = np.flatnonzero(sums)
+    return {int(k): float(sums[k]) for k in nonzero}
+
+
+def decode_table(table, n_labels, n_years):
+    # dict → array [label, kode]
+    size = STATES ** n_years
+    dense = np.zeros((n_labels + 1) * size)
+    for key, value in table.items():
+        dense[int(key)] += value
+    return dense.reshape(n_labels + 1, size)
+
+
+def _year_states(n_years):
+    # states[kode, i] = keadaan piksel pada tahun ke-i
+    codes = np.arange(STATES ** n_years)
+    return np.stack([(codes // STATES ** i) % STATES for i in range(n_years)], axis=1)
+
+
+def zonal_frames(result, features):
+    # result dari engine.compute_zonal_table → (luas per kawasan per tahun, transisi per pasangan tahun), dalam ha
+    years, n = result["years"], result["labels"]
+    if n != len(features):
+        raise ValueError("Jumlah kawasan tidak cocok dengan tabel zonal")
+    dense = decode_table(result["table"], n, len(years))[1:] / 10000  # label 0 = di luar kawasan
+    states = _year_states(len(years))
+    zones = features.reset_index(drop=True)
+    fields = [f for f in ZONE_FIELDS if f in zones.columns]
+    names = zones[fields].astype(str) if fields else pd.DataFrame({"Fitur": range(n)})
+
+    yearly = []
+    for i, year in enumerate(years):
+        frame = names.copy()
+        frame["Tahun"] = year
+        frame["Luas Air (Ha)"] = dense[:, states[:, i] == WATER].sum(axis=1)
+        frame["Luas Darat (Ha)"] = dense[:, states[:, i] == LAND].sum(axis=1)
+        yearly.append(frame)
+
+    transitions = []
+    for (i, a), (j, b) in combinations(enumerate(years), 2):
+        frame = names.copy()
+        frame["Dari"] = a
+        frame["Ke"] = b
+        frame["Air → Darat (Ha)"] = dense[:, (states[:, i] == WATER) & (states[:, j] == LAND)].sum(axis=1)
+        frame["Darat → Air (Ha)"] = dense[:, (states[:, i] == LAND) & (states[:, j] == WATER)].sum(axis=1)
+        transitions.append(frame)
+
+    group = list(names.columns)
+    if not transitions:
+        transitions = [names.assign(**{"Dari": None, "Ke": None, "Air → Darat (Ha)": 0.0, "Darat → Air (Ha)": 0.0}).iloc[:0]]
+    df_yearly = pd.concat(yearly).groupby(group + ["Tahun"], as_index=False).sum().round(2)
+    df_transitions = pd.concat(transitions).groupby(group + ["Dari", "Ke"], as_index=False).sum().round(2)
+    return df_yearly, df_transitions
@@ -1,13 +1,6 @@
 # app.py
+import time
 import streamlit as st
-import geopandas as gpd
-import folium
-import pandas as pd
-from folium import GeoJsonPopup, GeoJsonTooltip
-from streamlit_folium import st_folium
-import json
-import ee
-import geemap  
 
 # --- Konfigurasi Halaman ---
 st.set_page_config(
@@ -15,6 +8,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"  # Sembunyikan sidebar
 )
+page_started = time.perf_counter()
 
 st.markdown(
     """
@@ -27,205 +21,88 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
-# --- Inisialisasi Google Earth Engine ---
-@st.cache_resource
-def init_ee():
-    try:
-        # Cek apakah ada secrets (di Streamlit Cloud)
-        service_account = st.secrets["EE_SERVICE_ACCOUNT"]
-        private_key = st.secrets["EE_PRIVATE_KEY"]
-
-        credentials = ee.ServiceAccountCredentials(service_account, key_data=private_key)
-        ee.Initialize(credentials)
-        print("✅ GEE: Berhasil login dengan Service Account")
-    except Exception as e:
-        st.error("Gagal login ke Google Earth Engine. Pastikan secrets sudah benar.")
-        st.stop()
-init_ee()
-
-@st.cache_data
-def load_shp_data():
-    try:
-        gdf = gpd.read_file("./Kawasan_Konservasi/Kawasan_Konservasi.shp")
-        roi_bounds = (113.35, -7.22, 113.38, -7.19)
-        roi_box = gpd.GeoDataFrame(geometry=[gpd.GeoSeries.from_xy([roi_bounds[0]], [roi_bounds[1]], crs=4326).envelope[0]], crs=4326)
-        roi_box = roi_box.to_crs(gdf.crs).geometry.iloc[0]
-        gdf_roi = gdf[gdf.intersects(roi_box)]
-        return gdf_roi.to_crs(epsg=4326)
-    except Exception as e:
-        st.error(f"Error membaca file SHP: {e}")
-        return None
-
-konservasi_roi = load_shp_data()
-
-if konservasi_roi is None or len(konservasi_roi) == 0:
-    st.warning("Tidak ada data kawasan konservasi di wilayah Sampang atau file tidak ditemukan.")
-    st.stop()
-
-centroids = konservasi_roi.geometry.centroid
-center_lat = centroids.y.mean()
-center_lon = centroids.x.mean()
-
-columns_to_show = ['NAMOBJ', 'KODKWS', 'JNSRPR', 'WKLPR', 'REMARK', 'LUASHA']
-gdf_display = konservasi_roi.copy()
-if 'LUASHA' in gdf_display.columns:
-    gdf_display['LUASHA'] = pd.to_numeric(gdf_display['LUASHA'], errors='coerce')
-for col in gdf_display.columns:
-    if col != 'geometry':
-        gdf_display[col] = gdf_display[col].astype(str).replace('<NA>', '').replace('nan', '-')
-
-@st.cache_data
-def compute_area_stats(year):
-    try:
-        roi_ee = ee.Geometry.Rectangle([113.35, -7.22, 113.38, -7.19])
-        collection = (ee.ImageCollection("COPERNICUS/S2_HARMONIZED")
-                      .filterDate(f'{year}-01-01', f'{year}-12-31')
-                      .filterBounds(roi_ee)
-                      .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 10)))
-
-        image = collection.median()
-        ndwi = image.normalizedDifference(['B3', 'B11'])
-        water_mask = ndwi.gt(0)
-        land_mask = ndwi.lte(0)
-
-        # Hitung luas (m² → ha)
-        pixel_area = ee.Image.pixelArea()
-        water_area_m2 = water_mask.multiply(pixel_area).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=roi_ee,
-            scale=10,
-            maxPixels=1e10
-        )
-        land_area_m2 = land_mask.multiply(pixel_area).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=roi_ee,
-            scale=10,
-            maxPixels=1e10
-        )
-
-        water_area_ha = water_area_m2.get('nd').getInfo() / 10000 if water_area_m2.get('nd').getInfo() else 0
-        land_area_ha = land_area_m2.get('nd').getInfo() / 10000 if land_area_m2.get('nd').getInfo() else 0
-
-        return water_area_ha, land_area_ha
-    except:
-        return None, None
-
-# --- Hitung Statistik untuk Tahun Target ---
-target_years = [2015, 2020, 2025]
-area_data = []
-
-for year in target_years:
-    water_ha, land_ha = compute_area_stats(year)
-    area_data.append({
-        "Tahun": year,
-        "Luas Air (Ha)": round(water_ha, 2) if water_ha else 0,
-        "Luas Darat (Ha)": round(land_ha, 2) if land_ha else 0
-    })
-
-df_stats = pd.DataFrame(area_data)
-
-
-m = folium.Map(
-    location=[center_lat, center_lon],
-    zoom_start=14,
-    tiles=None
-)
-
-
-folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
-
-# Gunakan alternatif jika Esri error 400
-try:
-    folium.TileLayer(
-        tiles='https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
-        attr='Esri',
-        name='Satellite (Esri)',
-        max_zoom=19
-    ).add_to(m)
-except:
-    pass
-
-folium.TileLayer(
-    tiles='https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png',
-    attr='OpenTopoMap',
-    name='Topographic'
-).add_to(m)
-
-
-tooltip = GeoJsonTooltip(
-    fields=['NAMOBJ', 'KODKWS', 'LUASHA'],
-    aliases=['Nama:', 'Kode:', 'Luas (Ha):'],
-    localize=True,
-    style="background-color: white; border: 1px solid black;"
-)
 
-popup = GeoJsonPopup(
-    fields=columns_to_show,
-    aliases=[c.replace('_', ' ') for c in columns_to_show],
-    localize=True,
-    labels=True,
-    style="background-color: #F9F871; font-size: 13px; padding: 8px;"
-)
+# --- Modul berat diimpor setelah header tampil (first paint lebih cepat) ---
+import folium
+from folium import GeoJsonPopup, GeoJsonTooltip
+from sampang import metrics
+from sampang.ui import (MapPage, click_history_toggle, finish_metrics, metrics_toggle,
+                        show_pixel_history, threshold_slider)
 
-folium.GeoJson(
-    konservasi_roi,
-    name='Kawasan Konservasi',
-    style_function=lambda x: {'fillColor': '#32CD32', 'color': '#228B22', 'weight': 2, 'fillOpacity': 0.4},
-    tooltip=tooltip,
-    popup=popup
-).add_to(m)
+run_start = metrics.mark()
+show_metrics = metrics_toggle()
 
+columns_to_show = ['NAMOBJ', 'KODKWS', 'JNSRPR', 'WKLPR', 'REMARK', 'LUASHA']
 
 colors_water = {2015: '#4B8BBE', 2020: '#306998', 2025: '#FFE873'}
 colors_land = {2015: '#2E8B57', 2020: '#228B22', 2025: '#8B4513'}
 
-roi_ee = ee.Geometry.Rectangle([113.35, -7.22, 113.38, -7.19])
-
-for year in target_years:
-    try:
-        collection = (ee.ImageCollection("COPERNICUS/S2_HARMONIZED")
-                      .filterDate(f'{year}-01-01', f'{year}-12-31')
-                      .filterBounds(roi_ee)
-                      .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 10)))
-        image = collection.median().clip(roi_ee)
-        ndwi = image.normalizedDifference(['B3', 'B11'])
-
-        # Mask air dan darat
-        water_mask = ndwi.gt(0)
-        land_mask = ndwi.lte(0)
-
-        binary_water = water_mask.updateMask(water_mask)
-        binary_land = land_mask.updateMask(land_mask)
-
-        water_vectors = binary_water.reduceToVectors(geometry=roi_ee, scale=10, maxPixels=1e10, crs='EPSG:4326')
-        land_vectors = binary_land.reduceToVectors(geometry=roi_ee, scale=10, maxPixels=1e10, crs='EPSG:4326')
-
-        # Konversi ke GeoJSON
-        water_geojson = geemap.ee_to_geojson(water_vectors)
-        land_geojson = geemap.ee_to_geojson(land_vectors)
+def add_conservation_layer(parent, data):
+    tooltip = GeoJsonTooltip(
+        fields=['NAMOBJ', 'KODKWS', 'LUASHA'],
+        aliases=['Nama:', 'Kode:', 'Luas (Ha):'],
+        localize=True,
+        style="background-color: white; border: 1px solid black;"
+    )
 
-        # Tambahkan ke peta
-        folium.GeoJson(water_geojson, name=f'Air ({year})', style_function=lambda x, c=colors_water[year]: {
-            'color': c, 'weight': 1.8, 'fillOpacity': 0.5, 'fillColor': c}).add_to(m)
+    popup = GeoJsonPopup(
+        fields=columns_to_show,
+        aliases=[c.replace('_', ' ') for c in columns_to_show],
+        localize=True,
+        labels=True,
+        style="background-color: #F9F871; font-size: 13px; padding: 8px;"
+    )
 
-        folium.GeoJson(land_geojson, name=f'Darat ({year})', style_function=lambda x, c=colors_land[year]: {
-            'color': c, 'weight': 1.8, 'fillOpacity': 0.4, 'fillColor': c}).add_to(m)
+    folium.GeoJson(
+        data,
+        name='Kawasan Konservasi',
+        style_function=lambda x: {'fillColor': '#32CD32', 'color': '#228B22', 'weight': 2, 'fillOpacity': 0.4},
+        tooltip=tooltip,
+        popup=popup
+    ).add_to(parent)
+
+
+# --- Peta & statistik (lihat sampang.ui.MapPage): hanya air dan darat per tahun; tabel
+# hanya memuat luas air dan darat ---
+page = MapPage(
+    "ndwi",
+    layers=[
+        ("water", "Air", colors_water, 1.8, 0.5, False),
+        ("land", "Darat", colors_land, 1.8, 0.4, False),
+    ],
+    tiles=[
+        dict(tiles='https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
+             attr='Esri', name='Satellite (Esri)', max_zoom=19),
+        dict(tiles='https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png', attr='OpenTopoMap', name='Topographic'),
+    ],
+    conservation_layer='Kawasan Konservasi',
+    add_conservation=add_conservation_layer,
+    conservation_fields=['NAMOBJ', 'KODKWS', 'LUASHA'] + columns_to_show,
+    height=800,
+    columns=["Luas Air (Ha)", "Luas Darat (Ha)"],
+)
 
-    except Exception as e:
-        st.warning(f"Gagal proses vektor untuk tahun {year}: {e}")
+# --- Ambang NDWI (lihat sampang.ui.threshold_slider). Peta tetap memakai ambang bawaan ---
+threshold = threshold_slider()
 
+# --- Mode viewport (SAMPANG_LAYER_MODE=viewport): peta dasar tetap, fitur di viewport
+# yang dilaporkan st_folium dikirim sebagai layer dinamis (lihat sampang.viewport); geser/zoom
+# hanya menjalankan query indeks ---
+page.layer_picker()
 
-folium.LayerControl(collapsed=False).add_to(m)
-folium.LatLngPopup().add_to(m)
+# --- Riwayat piksel: klik peta → air/darat titik itu di semua tahun dari mask store,
+# tanpa query backend (lihat sampang.ui.show_pixel_history) ---
+click_history = click_history_toggle()
 
+# Peringatan, peta, dan tabel berada di slot yang diisi ulang tiap pass mode progresif
+status_slot = st.empty()
 col_map, col_stats = st.columns([6, 4])
 
 with col_map:
-    st_folium(m, width="100%", height=800)
+    map_slot = st.empty()
 
 with col_stats:
-    st.subheader("📊 Statistik Perubahan Wilayah")
-    st.dataframe(df_stats, use_container_width=True)
+    stats_slot = st.empty()
 
     st.markdown("### 📝 Interpretasi Hasil")
     st.markdown("""
@@ -252,3 +129,12 @@ with col_stats:
         "⚠️ Perubahan signifikan terjadi di pesisir Sampang. "
         "Pengelolaan berkelanjutan sangat diperlukan."
     )
+
+# --- Isi slot: hasil perkiraan (skala kasar) lalu hasil skala penuh (lihat sampang.ui) ---
+map_state, map_bytes = page.run(status_slot, map_slot, stats_slot, threshold, click_history)
+
+if click_history:
+    show_pixel_history(map_state, page.engine, page.years)
+
+# --- Instrumentasi (lihat sampang.metrics) ---
+finish_metrics(show_metrics, run_start, page_started, map_bytes)
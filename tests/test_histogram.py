@@ -0,0 +1,11 @@
+# Luas dari histogram NDWI pada ambang bawaan harus sama dengan statistik dari mask
+import pytest
+
+from sampang import config
+from sampang.histogram import threshold_row
+
+
+def test_histogram_at_default_threshold_matches_stats(engine, years):
+    for year in years:
+        row = threshold_row(year, engine.compute_histogram(year), config.NDWI_THRESHOLD)
+        assert row == pytest.approx(engine.compute_area_stats(year), abs=0.01)
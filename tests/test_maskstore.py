@@ -0,0 +1,23 @@
+# Riwayat piksel dari mask store harus sama dengan mask air/darat backend
+import numpy as np
+
+from sampang.maskstore import STATE_NAMES, build_store
+from sampang.zonal import LAND, NODATA, WATER
+
+
+def test_store_history_matches_masks(engine, tmp_path, years):
+    store = build_store(engine, years, str(tmp_path / "store"))
+    transform, window = engine.mask_grid(years[0])
+    x0, dx, _, y0, _, dy = transform
+    r0, r1, c0, c1 = window
+    nodes = [engine.pipeline.get("masks", year) for year in years]
+    rng = np.random.default_rng(0)
+    for row, col in zip(rng.integers(r0, r1, 200), rng.integers(c0, c1, 200)):
+        # Pusat piksel (baris, kolom) grid citra
+        lon, lat = x0 + (col + 0.5) * dx, y0 + (row + 0.5) * dy
+        expected = [WATER if n["water"][row - r0, col - c0] else LAND if n["land"][row - r0, col - c0] else NODATA
+                    for n in nodes]
+        history = store.history(lon, lat)
+        assert list(history["Tahun"]) == years
+        assert list(history["Keadaan"]) == [STATE_NAMES[state] for state in expected]
+    assert store.history(x0 - dx, y0 - dy) is None
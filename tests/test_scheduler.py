@@ -0,0 +1,129 @@
+# Penjadwal request EE dengan backend ee palsu (tanpa modul ee, tanpa jaringan)
+import json
+import threading
+import time
+
+import pytest
+
+from sampang import metrics
+from sampang.scheduler import Scheduler, request_key
+
+
+class FakeObject:
+    # Pengganti ee.ComputedObject: serialize() identik untuk ekspresi yang sama,
+    # getInfo() memanggil backend palsu
+    def __init__(self, backend, expression):
+        self.backend = backend
+        self.expression = expression
+
+    def serialize(self):
+        return json.dumps(self.expression, sort_keys=True)
+
+    def getInfo(self):
+        return self.backend(self.expression)
+
+
+class FakeClock:
+    # Waktu hanya maju lewat sleep(); semua durasi tidur dicatat
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(clock, retries=2):
+    return Scheduler(concurrency=4, rate=10, retries=retries, backoff=1.0, sleep=clock.sleep, clock=clock)
+
+
+def remote(scheduler, kind, obj):
+    return scheduler.run(request_key(kind, obj), obj.getInfo, kind)
+
+
+def coalesced(start, kind):
+    _, deltas = metrics.since(start)
+    return deltas.get(("remote_coalesced_total", (("kind", kind),)), 0)
+
+
+def test_identical_inflight_requests_are_coalesced():
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def backend(expression):
+        calls.append(expression)
+        started.set()
+        release.wait(5)
+        return {"area": 42}
+
+    scheduler = make_scheduler(FakeClock())
+    start = metrics.mark()
+    results = []
+    owner = threading.Thread(target=lambda: results.append(remote(scheduler, "coalesce", FakeObject(backend, {"year": 2015}))))
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(remote(scheduler, "coalesce", FakeObject(backend, {"year": 2015}))))
+    waiter.start()
+    # Request kedua sudah menunggu hasil request pertama sebelum backend dilepas
+    for _ in range(500):
+        if coalesced(start, "coalesce"):
+            break
+        time.sleep(0.01)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert calls == [{"year": 2015}]
+    assert results == [{"area": 42}, {"area": 42}]
+    assert coalesced(start, "coalesce") == 1
+    # Setelah selesai, request yang sama dikirim ulang (bukan hasil lama)
+    assert remote(scheduler, "coalesce", FakeObject(backend, {"year": 2015})) == {"area": 42}
+    assert len(calls) == 2
+
+
+def test_transient_error_is_retried():
+    errors = [RuntimeError("Too many concurrent aggregations."), TimeoutError("read timed out")]
+
+    def backend(expression):
+        if errors:
+            raise errors.pop(0)
+        return {"area": 7}
+
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    assert remote(scheduler, "retry", FakeObject(backend, {"year": 2020})) == {"area": 7}
+    assert errors == []
+    # Backoff eksponensial dengan jitter 0.5–1.0 (lebih lama dari jarak laju 0.1 s)
+    assert len(clock.sleeps) == 2
+    assert 0.5 <= clock.sleeps[0] <= 1.0 and 1.0 <= clock.sleeps[1] <= 2.0
+
+
+def test_transient_error_fails_after_last_retry():
+    calls = []
+
+    def backend(expression):
+        calls.append(expression)
+        raise RuntimeError("Quota exceeded")
+
+    scheduler = make_scheduler(FakeClock(), retries=1)
+    with pytest.raises(RuntimeError, match="Quota exceeded"):
+        remote(scheduler, "retry", FakeObject(backend, {"year": 2020}))
+    assert len(calls) == 2
+
+
+def test_non_transient_error_fails_immediately():
+    calls = []
+
+    def backend(expression):
+        calls.append(expression)
+        raise ValueError("Image.select: Pattern 'B99' did not match any bands.")
+
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    with pytest.raises(ValueError, match="B99"):
+        remote(scheduler, "fail", FakeObject(backend, {"year": 2025}))
+    assert len(calls) == 1
+    assert clock.sleeps == []
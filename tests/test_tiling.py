@@ -0,0 +1,21 @@
+# ROI yang dipecah menjadi tile harus memberi statistik dan layer yang sama dengan ROI utuh
+import pytest
+
+from sampang import config
+from sampang.stats import LAYER_KEYS
+from sampang.tiling import roi_tiles
+
+
+def test_tiled_stats_and_layers_match_untiled(engine, monkeypatch, years):
+    assert len(roi_tiles()) == 1
+    untiled = {year: (engine.compute_area_stats(year), engine.layer_geometries(year)) for year in years}
+
+    monkeypatch.setattr(config, "TILE_DEG", 0.01)
+    assert len(roi_tiles()) > 1
+    for year in years:
+        stats, geometries = untiled[year]
+        assert engine.compute_area_stats(year) == pytest.approx(stats, abs=0.01)
+        tiled = engine.layer_geometries(year)
+        for key in LAYER_KEYS:
+            assert not geometries[key].is_empty
+            assert tiled[key].symmetric_difference(geometries[key]).area == pytest.approx(0, abs=1e-12)
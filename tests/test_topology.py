@@ -0,0 +1,16 @@
+# Topologi bersama (TopoJSON) harus bisa didekode kembali menjadi layer aslinya
+import pytest
+
+from sampang.stats import LAYER_KEYS
+from sampang.topology import decode_object, encode_topology
+
+
+def test_topology_round_trip(engine, years):
+    for year in years:
+        geometries = engine.layer_geometries(year)
+        topology = encode_topology(geometries, grid=engine.topology_grid(year))
+        for key in LAYER_KEYS:
+            decoded = decode_object(topology, key)
+            assert decoded.is_valid
+            # Vertex berada di sudut piksel, jadi kuantisasi ke grid piksel tidak menggeser apa pun
+            assert decoded.symmetric_difference(geometries[key]).area == pytest.approx(0, abs=1e-12)
@@ -0,0 +1,17 @@
+# Vektorisasi per blok di pool proses harus identik dengan vektorisasi di satu proses
+from sampang import config, vectorize
+from sampang.stats import LAYER_KEYS
+
+
+def test_layers_identical_for_any_worker_count(engine, monkeypatch, years):
+    # Blok kecil agar setiap mask terbagi ke banyak blok
+    monkeypatch.setattr(config, "VECTORIZE_BLOCK_ROWS", 32)
+    single = engine.layer_geometries(years[0])
+    monkeypatch.setattr(config, "VECTORIZE_WORKERS", 2)
+    try:
+        pooled = engine.layer_geometries(years[0])
+    finally:
+        vectorize._shutdown_pool()
+    for key in LAYER_KEYS:
+        assert not single[key].is_empty
+        assert pooled[key].equals(single[key])
@@ -0,0 +1,22 @@
+# Total statistik zonal harus sama dengan statistik luas seluruh ROI
+import numpy as np
+import pytest
+
+from sampang.zonal import LAND, STATES, WATER, decode_table, zonal_frames
+
+
+def test_zonal_totals_match_stats(engine, conservation, years):
+    result = engine.compute_zonal_table(years)
+    df_zonal, df_transitions = zonal_frames(result, conservation)
+    assert len(df_transitions) == len(conservation)  # satu pasangan tahun
+    # Label 0 (di luar kawasan) ikut dijumlah untuk total seluruh ROI
+    dense = decode_table(result["table"], result["labels"], len(years)) / 10000
+    codes = np.arange(dense.shape[1])
+    for i, year in enumerate(years):
+        state = codes // STATES ** i % STATES  # keadaan tahun ke-i untuk setiap kode
+        stats = engine.compute_area_stats(year)
+        zones = df_zonal[df_zonal["Tahun"] == year]
+        assert len(zones) == len(conservation)
+        assert zones["Luas Darat (Ha)"].sum() == pytest.approx(stats["Darat di Konservasi (Ha)"], abs=0.01)
+        assert dense[:, state == WATER].sum() == pytest.approx(stats["Luas Air (Ha)"], abs=0.01)
+        assert dense[:, state == LAND].sum() == pytest.approx(stats["Luas Darat (Ha)"], abs=0.01)